@@ -0,0 +1,343 @@
+"""Admin pages: login, dashboard, rates, categories and products."""
+from flask import Blueprint, current_app, render_template, request, session, redirect, url_for
+from config import Config
+from database import db, GoldRate, GST, Category, Product, ProductImage
+from rates_cache import rates_cache
+from page_cache import page_cache
+from search_index import search_index
+from image_jobs import image_jobs
+from assets import save_upload
+from pricing import calculate_price, calculate_prices, materialize_prices
+from sqlalchemy.orm import selectinload
+
+admin = Blueprint('admin', __name__, url_prefix='/admin')
+
+# Admin credentials (in production, use environment variables)
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_IMAGE_EXTENSIONS']
+
+def remove_unused_image(image_path):
+    """Delete an upload (after commit) unless another product or category still uses it"""
+    in_use = (ProductImage.query.filter_by(path=image_path).count()
+              + Category.query.filter_by(image=image_path).count())
+    if not in_use:
+        image_jobs.remove(f'static/{image_path}')
+
+def rates_changed():
+    """Call after committing a new GoldRate or GST row"""
+    rates_cache.invalidate()
+    if current_app.config['MATERIALIZED_PRICING']:
+        materialize_prices(rates_cache.get())
+    page_cache.invalidate()
+
+def set_materialized_price(product):
+    """Keep a single product's stored price current in materialized mode"""
+    if current_app.config['MATERIALIZED_PRICING']:
+        rates = rates_cache.get()
+        product.current_price = calculate_price(
+            product.weight,
+            rates.gold_22k,
+            product.making_charge,
+            rates.gst
+        )
+
+@admin.route('/login', methods=['GET', 'POST'])
+def admin_login():
+    """Admin login"""
+    if request.method == 'POST':
+        username = request.form.get('username')
+        password = request.form.get('password')
+        
+        if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+            session['admin_logged_in'] = True
+            return redirect(url_for('admin.admin_dashboard'))
+    
+    return render_template('admin/login.html')
+
+@admin.route('/logout')
+def admin_logout():
+    """Admin logout"""
+    session.pop('admin_logged_in', None)
+    return redirect(url_for('admin.admin_login'))
+
+@admin.route('/dashboard')
+def admin_dashboard():
+    """Admin dashboard"""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.admin_login'))
+    
+    try:
+        # Get counts
+        categories_count = Category.query.count()
+        products_count = Product.query.count()
+        
+        # Get latest rates
+        gold_rate = GoldRate.query.order_by(GoldRate.updated_at.desc()).first()
+        gst = GST.query.order_by(GST.updated_at.desc()).first()
+        
+        return render_template('admin/dashboard.html',
+                             categories_count=categories_count,
+                             products_count=products_count,
+                             gold_rate=gold_rate,
+                             gst=gst,
+                             shop_name=Config.SHOP_NAME)
+    except Exception as e:
+        return f"Admin dashboard error: {str(e)}", 500
+
+@admin.route('/rates', methods=['GET', 'POST'])
+def admin_rates():
+    """Manage gold/silver rates and GST"""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.admin_login'))
+    
+    if request.method == 'POST':
+        try:
+            action = request.form.get('action')
+            
+            if action == 'update_rates':
+                gold_22k = float(request.form.get('gold_22k'))
+                silver = float(request.form.get('silver'))
+                
+                new_rate = GoldRate(gold_22k=gold_22k, silver=silver)
+                db.session.add(new_rate)
+                db.session.commit()
+                rates_changed()
+                
+                return redirect(url_for('admin.admin_rates'))
+            
+            elif action == 'update_gst':
+                gst_percentage = float(request.form.get('gst_percentage'))
+                
+                new_gst = GST(percentage=gst_percentage)
+                db.session.add(new_gst)
+                db.session.commit()
+                rates_changed()
+                
+                return redirect(url_for('admin.admin_rates'))
+        except Exception as e:
+            return f"Error updating rates: {str(e)}", 500
+    
+    try:
+        gold_rate = GoldRate.query.order_by(GoldRate.updated_at.desc()).first()
+        gst = GST.query.order_by(GST.updated_at.desc()).first()
+        
+        return render_template('admin/rates.html', 
+                             gold_rate=gold_rate, 
+                             gst=gst,
+                             shop_name=Config.SHOP_NAME)
+    except Exception as e:
+        return f"Error loading rates page: {str(e)}", 500
+
+@admin.route('/categories', methods=['GET', 'POST'])
+def admin_categories():
+    """Manage categories"""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.admin_login'))
+    
+    if request.method == 'POST':
+        try:
+            action = request.form.get('action')
+            
+            if action == 'add':
+                name = request.form.get('name')
+                name_bn = request.form.get('name_bn')
+                image = request.files.get('image')
+                
+                category = Category(name=name, name_bn=name_bn)
+                
+                is_new = False
+                if image and allowed_file(image.filename):
+                    category.image, is_new = save_upload(image, 'categories')
+                
+                db.session.add(category)
+                db.session.commit()
+                
+                if is_new:
+                    future = image_jobs.submit_images([f'static/{category.image}'])
+                    future.add_done_callback(lambda f: page_cache.invalidate())
+                
+            elif action == 'edit':
+                category_id = int(request.form.get('category_id'))
+                name = request.form.get('name')
+                name_bn = request.form.get('name_bn')
+                image = request.files.get('image')
+                
+                category = Category.query.get(category_id)
+                if category:
+                    category.name = name
+                    category.name_bn = name_bn
+                    
+                    old_image = None
+                    if image and allowed_file(image.filename):
+                        old_image = category.image
+                        category.image, is_new = save_upload(image, 'categories')
+                        if is_new:
+                            future = image_jobs.submit_images([f'static/{category.image}'])
+                            future.add_done_callback(lambda f: page_cache.invalidate())
+                    
+                    db.session.commit()
+                    search_index.invalidate()
+                    
+                    # Delete old image if nothing else uses it
+                    if old_image and old_image != category.image:
+                        remove_unused_image(old_image)
+            
+            elif action == 'delete':
+                category_id = int(request.form.get('category_id'))
+                category = Category.query.get(category_id)
+                if category:
+                    old_image = category.image
+                    db.session.delete(category)
+                    db.session.commit()
+                    search_index.invalidate()
+                    
+                    # Delete associated image
+                    if old_image:
+                        remove_unused_image(old_image)
+            
+            page_cache.invalidate()
+            return redirect(url_for('admin.admin_categories'))
+            
+        except Exception as e:
+            return f"Error managing categories: {str(e)}", 500
+    
+    try:
+        categories = Category.query.all()
+        return render_template('admin/categories.html', 
+                             categories=categories,
+                             shop_name=Config.SHOP_NAME)
+    except Exception as e:
+        return f"Error loading categories: {str(e)}", 500
+
+@admin.route('/products', methods=['GET', 'POST'])
+def admin_products():
+    """Manage products"""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.admin_login'))
+    
+    if request.method == 'POST':
+        try:
+            action = request.form.get('action')
+            
+            if action == 'add':
+                name = request.form.get('name')
+                name_bn = request.form.get('name_bn')
+                description_bn = request.form.get('description_bn')
+                category_id = int(request.form.get('category_id'))
+                purity = request.form.get('purity')
+                weight = float(request.form.get('weight'))
+                making_charge = float(request.form.get('making_charge'))
+                stock_status = request.form.get('stock_status')
+                
+                # Handle multiple images
+                image_paths = []
+                new_paths = []
+                for i in range(1, 4):  # Max 3 images
+                    image = request.files.get(f'image_{i}')
+                    if image and allowed_file(image.filename):
+                        image_path, is_new = save_upload(image, 'products')
+                        image_paths.append(image_path)
+                        if is_new:
+                            new_paths.append(image_path)
+                
+                product = Product(
+                    name=name,
+                    name_bn=name_bn,
+                    description_bn=description_bn,
+                    category_id=category_id,
+                    purity=purity,
+                    weight=weight,
+                    making_charge=making_charge,
+                    stock_status=stock_status,
+                    images_status='pending' if new_paths else 'ready'
+                )
+                for position, image_path in enumerate(image_paths):
+                    image = ProductImage(position=position, path=image_path)
+                    # A reused upload already has its size, hash and variants recorded
+                    existing = ProductImage.query.filter_by(path=image_path).first()
+                    if existing:
+                        image.width, image.height = existing.width, existing.height
+                        image.content_hash, image.variants = existing.content_hash, existing.variants
+                    product.images.append(image)
+                set_materialized_price(product)
+                
+                db.session.add(product)
+                db.session.commit()
+                search_index.add_product(product)
+                
+                # Optimize in the background; the page returns right away
+                if new_paths:
+                    future = image_jobs.submit_product(product.id, [f'static/{path}' for path in new_paths])
+                    future.add_done_callback(lambda f: page_cache.invalidate())
+                
+            elif action == 'edit':
+                product_id = int(request.form.get('product_id'))
+                product = Product.query.get(product_id)
+                
+                if product:
+                    product.name = request.form.get('name')
+                    product.name_bn = request.form.get('name_bn')
+                    product.description_bn = request.form.get('description_bn')
+                    product.category_id = int(request.form.get('category_id'))
+                    product.purity = request.form.get('purity')
+                    product.weight = float(request.form.get('weight'))
+                    product.making_charge = float(request.form.get('making_charge'))
+                    product.stock_status = request.form.get('stock_status')
+                    set_materialized_price(product)
+                    
+                    db.session.commit()
+                    search_index.add_product(product)
+            
+            elif action == 'delete':
+                product_id = int(request.form.get('product_id'))
+                product = Product.query.get(product_id)
+                if product:
+                    old_images = product.to_dict(['images'])['images']
+                    db.session.delete(product)
+                    db.session.commit()
+                    search_index.remove_product(product_id)
+                    
+                    # Delete associated images
+                    for img_path in old_images:
+                        remove_unused_image(img_path)
+            
+            page_cache.invalidate()
+            return redirect(url_for('admin.admin_products'))
+            
+        except Exception as e:
+            return f"Error managing products: {str(e)}", 500
+    
+    try:
+        categories = Category.query.all()
+        products = Product.query.options(selectinload(Product.images)).all()
+        
+        # Calculate prices for display
+        gold_rate = GoldRate.query.order_by(GoldRate.updated_at.desc()).first()
+        gst = GST.query.order_by(GST.updated_at.desc()).first()
+        
+        prices = []
+        if gold_rate and gst:
+            prices = calculate_prices(
+                [p.weight for p in products],
+                [p.making_charge for p in products],
+                gold_rate.gold_22k,
+                gst.percentage
+            )
+        
+        product_list = []
+        for i, product in enumerate(products):
+            product_dict = product.to_dict()
+            if prices:
+                product_dict['calculated_price'] = prices[i]
+            product_list.append(product_dict)
+        
+        return render_template('admin/products.html',
+                             categories=categories,
+                             products=product_list,
+                             shop_name=Config.SHOP_NAME)
+    except Exception as e:
+        return f"Error loading products: {str(e)}", 500
@@ -0,0 +1,597 @@
+"""JSON API: rates, categories, products, search and prices, plus the admin API under /api/admin."""
+from flask import Blueprint, current_app, request, jsonify, session, Response, stream_with_context
+from werkzeug.exceptions import BadRequest
+import json
+import hashlib
+import time
+import zipfile
+from datetime import datetime, timedelta
+import math
+from config import Config
+from database import db, GoldRate, GST, Product
+import bulk_import
+import catalogue_export
+from rate_history import BUCKETS, rate_history, rates_as_of
+from rates_cache import rates_cache
+from page_cache import page_cache
+from category_summaries import category_summaries
+from read_replicas import read_replicas
+from search_index import search_index
+from admin import rates_changed, remove_unused_image
+from pricing import calculate_prices, price_expression, price_products
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import load_only, selectinload
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+def rates_etag(rates):
+    return hashlib.sha1(f"{rates.updated_at.isoformat()}|{rates.gst_updated_at.isoformat()}".encode()).hexdigest()
+
+def products_etag(rates):
+    """ETag for product listings, or None when there is no shared data version"""
+    data_version = page_cache.data_version()
+    if data_version is None:
+        return None
+    return hashlib.sha1(f"{rates_etag(rates)}|{data_version}".encode()).hexdigest()
+
+def not_modified(etag):
+    """A 304 response if the client's If-None-Match already has this ETag"""
+    if etag and etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
+    return None
+
+def with_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified and make clients revalidate before reuse"""
+    if etag:
+        response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def rates_payload(rates):
+    return {
+        'gold_22k': rates.gold_22k,
+        'silver': rates.silver,
+        'updated_at': rates.updated_at.strftime('%I:%M %p'),
+        'gst': rates.gst
+    }
+
+@api.route('/rates')
+@read_replicas.reads
+def get_rates():
+    """Get current gold and silver rates"""
+    try:
+        # Served from the rates cache, so a 304 costs no database query
+        rates = rates_cache.get()
+        etag = rates_etag(rates)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        response = jsonify(rates_payload(rates))
+        return with_validators(response, etag, max(rates.updated_at, rates.gst_updated_at))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/rates/stream')
+def stream_rates():
+    """Server-Sent Events: push the rates whenever they change"""
+    if not current_app.config['RATES_STREAM_ENABLED']:
+        # 204 tells EventSource not to reconnect; clients fall back to polling
+        return '', 204
+    
+    last_event_id = request.headers.get('Last-Event-ID')
+    poll = current_app.config['RATES_STREAM_POLL']
+    heartbeat = current_app.config['RATES_STREAM_HEARTBEAT']
+    max_age = current_app.config['RATES_STREAM_MAX_AGE']
+    app = current_app._get_current_object()
+    
+    def events():
+        sent = last_event_id
+        started = last_write = time.monotonic()
+        yield f"retry: {int(poll * 1000)}\n\n"
+        while time.monotonic() - started < max_age:
+            # A fresh app context per check so no DB session outlives it
+            with app.app_context():
+                rates = rates_cache.get()
+            etag = rates_etag(rates)
+            if etag != sent:
+                yield f"id: {etag}\nevent: rates\ndata: {json.dumps(rates_payload(rates))}\n\n"
+                sent = etag
+                last_write = time.monotonic()
+            elif time.monotonic() - last_write >= heartbeat:
+                yield ": keep-alive\n\n"
+                last_write = time.monotonic()
+            rates_cache.wait_for_change(poll)
+    
+    response = Response(events(), mimetype='text/event-stream')
+    response.cache_control.no_cache = True
+    response.headers['X-Accel-Buffering'] = 'no'  # let nginx pass events through
+    return response
+
+@api.route('/rates/history')
+def get_rate_history():
+    """Gold/silver OHLC per day or week
+
+    Query params: from and to (ISO dates, default the last year) and
+    bucket (day or week).
+    """
+    try:
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            return jsonify({'error': f"bucket must be one of: {', '.join(BUCKETS)}"}), 400
+        
+        try:
+            end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else datetime.utcnow()
+            start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(days=365)
+        except ValueError:
+            return jsonify({'error': 'from and to must be ISO dates, e.g. 2025-10-01'}), 400
+        
+        # History only changes when a new rate is added or, without from/to, when the
+        # default window moves on to a new day
+        rates = rates_cache.get()
+        window = f"{start.date().isoformat()}|{end.date().isoformat()}"
+        etag = hashlib.sha1(f"{rates_etag(rates)}|{request.full_path}|{window}".encode()).hexdigest()
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        response = jsonify({
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'bucket': bucket,
+            'history': rate_history(start, end, bucket)
+        })
+        return with_validators(response, etag)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/categories')
+@read_replicas.reads
+def get_categories():
+    """Get all categories with their product counts and weight/price ranges"""
+    try:
+        return jsonify(category_summaries.get(rates_cache.get()))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+PRODUCT_API_FIELDS = set(Product.DICT_COLUMNS) | set(Product.DICT_RELATIONSHIPS) | {'calculated_price'}
+DEFAULT_PRODUCT_API_FIELDS = Product.DEFAULT_DICT_FIELDS + ['calculated_price']
+
+PRODUCT_SORTS = ('category', 'price', 'weight', 'newest')
+
+def product_sort(sort, rates, materialized):
+    """Return (SQL sort expression, descending, row -> sort value, cursor text -> sort value)
+
+    Cursor values must compare exactly with the SQL values: weight and
+    making_charge are DOUBLE columns, so a float read from them (or the
+    unrounded price, computed in the same order as the SQL expression)
+    survives the round trip through repr() in the cursor unchanged.
+    """
+    if sort == 'price':
+        if materialized:
+            return Product.current_price, False, lambda p: p.current_price, int
+        # Price is increasing in weight * (rate + making_charge) for fixed rates.
+        # No index covers this expression, so each page scans and sorts the matching products.
+        return (Product.weight * rates.gold_22k + Product.weight * Product.making_charge, False,
+                lambda p: p.weight * rates.gold_22k + p.weight * p.making_charge, float)
+    if sort == 'weight':
+        return Product.weight, False, lambda p: p.weight, float
+    if sort == 'newest':
+        return Product.created_at, True, lambda p: p.created_at.isoformat(), datetime.fromisoformat
+    return Product.category_id, False, lambda p: p.category_id, int
+
+class ProductListing:
+    """One /api/products page: the statement to run and how to turn its rows into the response
+
+    Built from the query params without touching the database, so the
+    sync view and the async API (asgi.py) share it. Raises BadRequest
+    for invalid params.
+    """
+    
+    def __init__(self, args, rates, materialized):
+        self.rates = rates
+        self.materialized = materialized
+        
+        category_id = args.get('category_id', type=int)
+        sort = args.get('sort', 'category')
+        if sort not in PRODUCT_SORTS:
+            raise BadRequest(f"sort must be one of: {', '.join(PRODUCT_SORTS)}")
+        
+        sort_column, descending, self.sort_value, parse_value = product_sort(sort, rates, materialized)
+        
+        try:
+            limit = int(args.get('limit', Config.PRODUCTS_PAGE_SIZE))
+            min_price = args.get('min_price', type=float)
+            max_price = args.get('max_price', type=float)
+            after = None
+            cursor = args.get('cursor')
+            if cursor:
+                value, product_id = cursor.rsplit(':', 1)
+                after = parse_value(value), int(product_id)
+        except ValueError:
+            raise BadRequest('Invalid limit or cursor')
+        self.limit = max(1, min(limit, Config.PRODUCTS_MAX_PAGE_SIZE))
+        
+        fields = args.get('fields')
+        if fields:
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+            unknown = set(fields) - PRODUCT_API_FIELDS
+            if unknown:
+                raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}")
+        else:
+            fields = DEFAULT_PRODUCT_API_FIELDS
+        self.fields = fields
+        
+        # Load only the columns the requested fields and the sort need
+        self.dict_fields = [f for f in fields if f != 'calculated_price']
+        columns = {'id', 'category_id'} | {Product.DICT_COLUMNS[f] for f in self.dict_fields if f in Product.DICT_COLUMNS}
+        if 'calculated_price' in fields:
+            columns |= {'weight', 'making_charge', 'current_price'}
+        if sort == 'price':
+            columns |= {'weight', 'making_charge', 'current_price'}
+        elif sort in ('weight', 'newest'):
+            columns.add('weight' if sort == 'weight' else 'created_at')
+        
+        query = select(Product).options(load_only(*[getattr(Product, c) for c in columns]))
+        # Images come from product_images in one extra query per page
+        for relationship in set(self.dict_fields) & set(Product.DICT_RELATIONSHIPS):
+            query = query.options(selectinload(getattr(Product, relationship)))
+        if category_id:
+            query = query.filter(Product.category_id == category_id)
+        
+        # ceil(x) >= min  <=>  x > ceil(min) - 1, and ceil(x) <= max  <=>  x <= floor(max)
+        if min_price is not None or max_price is not None:
+            if materialized:
+                price = Product.current_price
+                if min_price is not None:
+                    query = query.filter(price >= math.ceil(min_price))
+                if max_price is not None:
+                    query = query.filter(price <= math.floor(max_price))
+            else:
+                price = price_expression(rates)
+                if min_price is not None:
+                    query = query.filter(price > math.ceil(min_price) - 1)
+                if max_price is not None:
+                    query = query.filter(price <= math.floor(max_price))
+        
+        if after:
+            if descending:
+                query = query.filter(or_(
+                    sort_column < after[0],
+                    and_(sort_column == after[0], Product.id < after[1])
+                ))
+            else:
+                query = query.filter(or_(
+                    sort_column > after[0],
+                    and_(sort_column == after[0], Product.id > after[1])
+                ))
+        
+        if descending:
+            query = query.order_by(sort_column.desc(), Product.id.desc())
+        else:
+            query = query.order_by(sort_column, Product.id)
+        
+        # Fetch one extra row to know whether another page exists
+        self.statement = query.limit(self.limit + 1)
+    
+    def page(self, products):
+        """The response body for the rows self.statement returned"""
+        has_more = len(products) > self.limit
+        products = products[:self.limit]
+        
+        prices = []
+        if 'calculated_price' in self.fields:
+            if self.materialized and all(p.current_price is not None for p in products):
+                prices = [p.current_price for p in products]
+            else:
+                prices = price_products(products, self.rates)
+        
+        product_list = []
+        for i, product in enumerate(products):
+            product_dict = product.to_dict(self.dict_fields)
+            if prices:
+                product_dict['calculated_price'] = prices[i]
+            product_list.append(product_dict)
+        
+        next_cursor = None
+        if has_more:
+            last = products[-1]
+            next_cursor = f"{self.sort_value(last)}:{last.id}"
+        
+        return {
+            'products': product_list,
+            'next_cursor': next_cursor
+        }
+
+@api.route('/products')
+@read_replicas.reads
+def get_products():
+    """Get products, one keyset page at a time
+
+    Query params: category_id, min_price, max_price, sort (category, price,
+    weight or newest), limit, cursor (next_cursor from the previous page)
+    and fields (comma separated keys to return).
+    
+    Price filters and sort=price use the indexed current_price when
+    MATERIALIZED_PRICING is on. Without it they are computed from the
+    current rates, which pages correctly but scans every product in the
+    category on each page.
+    """
+    try:
+        rates = rates_cache.get()
+        etag = products_etag(rates)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        try:
+            listing = ProductListing(request.args, rates, current_app.config['MATERIALIZED_PRICING'])
+        except BadRequest as e:
+            return jsonify({'error': e.description}), 400
+        
+        products = db.session.scalars(listing.statement).all()
+        response = jsonify(listing.page(products))
+        return with_validators(response, etag)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/search')
+def search_products():
+    """Search products by name, description, purity and category name
+
+    Query params: q and limit. Every word of q must match a word of the
+    product, or the start of one. Served from the in-memory search index.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        try:
+            limit = int(request.args.get('limit', Config.SEARCH_RESULTS_LIMIT))
+        except ValueError:
+            return jsonify({'error': 'Invalid limit'}), 400
+        limit = max(1, min(limit, Config.SEARCH_MAX_RESULTS))
+        
+        total, results = search_index.search(query, limit)
+        rates = rates_cache.get()
+        prices = calculate_prices(
+            [document['weight'] for document, _ in results],
+            [document['making_charge'] for document, _ in results],
+            rates.gold_22k,
+            rates.gst
+        )
+        
+        products = []
+        for (document, score), price in zip(results, prices):
+            product_dict = dict(document)
+            product_dict['calculated_price'] = price
+            product_dict['score'] = score
+            products.append(product_dict)
+        
+        return jsonify({
+            'query': query,
+            'total': total,
+            'products': products
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/prices/as-of', methods=['GET', 'POST'])
+def get_prices_as_of():
+    """Price products at the rates in effect at a past moment
+
+    GET takes product_ids (comma separated) and at (ISO timestamp). POST
+    takes JSON {"items": [{"product_id": 1, "at": "2025-10-02T12:00"}, ...]}
+    so one request can mix timestamps. Rates are looked up once per
+    distinct timestamp, and each group is priced in one pass.
+    """
+    try:
+        try:
+            if request.method == 'POST':
+                data = request.get_json(silent=True)
+                if not isinstance(data, dict):
+                    return jsonify({'error': 'Send a JSON object: {"items": [{"product_id": 1, "at": "..."}]}'}), 400
+                items = [(int(item['product_id']), datetime.fromisoformat(item['at']))
+                         for item in data.get('items', [])]
+            else:
+                at = datetime.fromisoformat(request.args['at'])
+                items = [(int(pid), at) for pid in request.args.get('product_ids', '').split(',') if pid.strip()]
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Each item needs a product_id and an ISO "at" timestamp'}), 400
+        if not items:
+            return jsonify({'error': 'No products given'}), 400
+        if len(items) > Config.PRICE_AS_OF_MAX_ITEMS:
+            return jsonify({'error': f"At most {Config.PRICE_AS_OF_MAX_ITEMS} items per request"}), 400
+        
+        product_ids = {pid for pid, _ in items}
+        products = {
+            p.id: p for p in Product.query
+            .options(load_only(Product.id, Product.weight, Product.making_charge))
+            .filter(Product.id.in_(product_ids))
+        }
+        
+        # Group by moment: one rate lookup and one pricing pass per distinct timestamp
+        by_moment = {}
+        for pid, at in items:
+            by_moment.setdefault(at, []).append(pid)
+        
+        priced = {}
+        for at, pids in by_moment.items():
+            rates = rates_as_of(at)
+            found = [products[pid] for pid in pids if pid in products]
+            prices = price_products(found, rates) if rates and found else []
+            for product, price in zip(found, prices):
+                priced[(product.id, at)] = {
+                    'price': price,
+                    'gold_22k': rates.gold_22k,
+                    'gst': rates.gst,
+                    'rate_updated_at': rates.updated_at.isoformat()
+                }
+        
+        results = []
+        for pid, at in items:
+            result = {'product_id': pid, 'at': at.isoformat()}
+            if pid not in products:
+                result['error'] = 'Product not found'
+            elif (pid, at) not in priced:
+                result['error'] = 'No rate recorded at that time'
+            else:
+                result.update(priced[(pid, at)])
+            results.append(result)
+        
+        return jsonify({'prices': results})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Admin API
+@api.route('/admin/update-rates', methods=['POST'])
+def api_update_rates():
+    """API to update rates"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        data = request.json
+        new_rate = GoldRate(
+            gold_22k=float(data['gold_22k']),
+            silver=float(data['silver'])
+        )
+        db.session.add(new_rate)
+        db.session.commit()
+        rates_changed()
+        
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/update-gst', methods=['POST'])
+def api_update_gst():
+    """API to update GST"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        data = request.json
+        new_gst = GST(percentage=float(data['gst_percentage']))
+        db.session.add(new_gst)
+        db.session.commit()
+        rates_changed()
+        
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/products', methods=['GET'])
+def api_get_all_products():
+    """API to get all products for admin"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        products = Product.query.options(selectinload(Product.images)).all()
+        return jsonify([product.to_dict() for product in products])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/export', methods=['GET'])
+def api_export_products():
+    """API to download the whole catalogue with current prices
+
+    Query param: format (ndjson or csv, default ndjson). Rows are streamed
+    a chunk at a time, all priced at the rates current when the export began.
+    """
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in catalogue_export.FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(catalogue_export.FORMATS)}"}), 400
+    
+    try:
+        rates = rates_cache.get()
+        body = catalogue_export.stream(export_format, rates, Config.EXPORT_CHUNK_SIZE)
+        response = Response(stream_with_context(body),
+                            mimetype=catalogue_export.FORMATS[export_format])
+        response.headers['Content-Disposition'] = \
+            f'attachment; filename=catalogue-{datetime.now():%Y%m%d}.{export_format}'
+        response.headers['X-Accel-Buffering'] = 'no'  # let nginx pass chunks through
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/products/import', methods=['POST'])
+def api_import_products():
+    """API to bulk import products from a CSV/XLSX sheet and a ZIP of their images
+
+    Form files: file (the sheet, columns as in bulk_import.py) and images
+    (optional ZIP). Returns the import report with each failed row's errors.
+    """
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # A whole collection's images are far larger than one product form
+    request.max_content_length = Config.IMPORT_MAX_CONTENT_LENGTH
+    try:
+        sheet = request.files.get('file')
+        if not sheet or not sheet.filename:
+            return jsonify({'error': 'file is required'}), 400
+        images = request.files.get('images')
+        
+        try:
+            archive = zipfile.ZipFile(images.stream) if images and images.filename else None
+            rows = bulk_import.read_rows(sheet.stream, sheet.filename)
+            report, futures = bulk_import.import_products(rows, archive, Config.IMPORT_BATCH_SIZE)
+        except (ValueError, zipfile.BadZipFile) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        page_cache.invalidate()
+        search_index.invalidate()
+        # Pages show image sizes and variants once the jobs have written them
+        bulk_import.when_all_done(futures, page_cache.invalidate)
+        return jsonify(report)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/products/<int:product_id>/images', methods=['GET'])
+def api_product_images_status(product_id):
+    """API to check whether a product's uploaded images are processed"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        product = Product.query.get_or_404(product_id)
+        return jsonify({
+            'product_id': product.id,
+            'images_status': product.images_status or 'ready',
+            'images': product.to_dict(['images'])['images']
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/products/<int:product_id>', methods=['DELETE'])
+def api_delete_product(product_id):
+    """API to delete product"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        product = Product.query.get_or_404(product_id)
+        
+        old_images = product.to_dict(['images'])['images']
+        db.session.delete(product)
+        db.session.commit()
+        search_index.remove_product(product_id)
+        
+        # Delete associated images
+        for img_path in old_images:
+            remove_unused_image(img_path)
+        
+        page_cache.invalidate()
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,242 @@
+"""ASGI entry point: the busiest public JSON endpoints served on an event loop.
+
+    uvicorn asgi:app --workers 2 --backlog 4096 --timeout-keep-alive 30
+
+GET /api/rates, /api/categories and /api/products are answered by async
+handlers on an async engine (aiomysql for MySQL, aiosqlite for SQLite),
+so an idle keep-alive connection or a slow client costs a socket, not a
+thread. A database connection is held only while a query runs. The
+responses are the same as the Flask views': same JSON, same ETags, and
+the same ProductListing builds the products query.
+
+With RATES_STREAM_ENABLED, GET /api/rates/stream is served here too, so
+an open Server-Sent Events stream costs no thread either.
+
+Every other request goes to the Flask app, run on ASYNC_WSGI_THREADS
+threads per process by a2wsgi. Rates come from the shared rates cache;
+on the rare miss they are loaded through Flask in a thread, which also
+seeds the defaults on an empty database.
+"""
+import asyncio
+import json
+import time
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest
+from werkzeug.http import http_date, parse_etags
+
+from api import ProductListing, products_etag, rates_etag, rates_payload
+from app import app as flask_app
+from category_summaries import category_summaries
+from database import pool_options
+from metrics import metrics
+from rates_cache import rates_cache
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'mariadb+pymysql': 'mariadb+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite'
+}
+
+
+def async_database_uri(config):
+    """ASYNC_DATABASE_URI, or the primary's URI with its async driver"""
+    if config.get('ASYNC_DATABASE_URI'):
+        return config['ASYNC_DATABASE_URI']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.drivername not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {url.drivername}; set ASYNC_DATABASE_URI")
+    return url.set(drivername=ASYNC_DRIVERS[url.drivername])
+
+
+class AsyncAPI:
+    """ASGI app: async handlers for the read-only JSON endpoints, Flask for the rest"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.wsgi = WSGIMiddleware(flask_app, workers=self.config['ASYNC_WSGI_THREADS'])
+        self.handlers = {
+            '/api/rates': ('api.get_rates', self.get_rates),
+            '/api/categories': ('api.get_categories', self.get_categories),
+            '/api/products': ('api.get_products', self.get_products)
+        }
+        self._engine = None
+        self._sessions = None
+
+    @property
+    def sessions(self):
+        # Created in the serving process, after any fork
+        if self._sessions is None:
+            uri = async_database_uri(self.config)
+            options = pool_options(uri, self.config)
+            if 'pool_size' in options:
+                options.update(pool_size=self.config['ASYNC_POOL_SIZE'],
+                               max_overflow=self.config['ASYNC_MAX_OVERFLOW'])
+            self._engine = create_async_engine(uri, **options)
+            metrics.watch_engine(self._engine.sync_engine)
+            self._sessions = async_sessionmaker(self._engine, expire_on_commit=False)
+        return self._sessions
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] in self.handlers:
+            await self.handle(scope, send)
+        elif (scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] == '/api/rates/stream'
+                and self.config['RATES_STREAM_ENABLED']):
+            await self.stream_rates(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._engine is not None:
+                    await self._engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle(self, scope, send):
+        started = time.perf_counter()
+        endpoint, handler = self.handlers[scope['path']]
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        args = MultiDict(parse_qsl(scope['query_string'].decode(), keep_blank_values=True))
+        try:
+            status, body, extra_headers = await handler(args, headers)
+        except BadRequest as e:
+            status, body, extra_headers = 400, {'error': e.description}, {}
+        except Exception as e:
+            status, body, extra_headers = 500, {'error': str(e)}, {}
+
+        response_headers = dict(extra_headers)
+        content = b''
+        if body is not None:
+            content = self.flask_app.json.response(body).get_data()  # byte for byte what jsonify sends
+            response_headers['content-type'] = 'application/json'
+        response_headers['content-length'] = str(len(content))
+        await self.start_response(send, status, response_headers, headers)
+        await send({'type': 'http.response.body', 'body': content})
+
+        metrics.request_seconds.observe(time.perf_counter() - started, endpoint, 'GET')
+        metrics.requests.inc(endpoint, 'GET', str(status))
+
+    @staticmethod
+    async def start_response(send, status, response_headers, request_headers):
+        # What Flask-CORS adds to the same responses
+        if 'origin' in request_headers:
+            response_headers['access-control-allow-origin'] = request_headers['origin']
+            response_headers['vary'] = 'Origin'
+        else:
+            response_headers['access-control-allow-origin'] = '*'
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in response_headers.items()]
+        })
+
+    async def stream_rates(self, scope, receive, send):
+        """The /api/rates/stream events of the Flask view, on the event loop"""
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        poll = self.config['RATES_STREAM_POLL']
+        heartbeat = self.config['RATES_STREAM_HEARTBEAT']
+        max_age = self.config['RATES_STREAM_MAX_AGE']
+
+        async def wait_for_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+        disconnected = asyncio.ensure_future(wait_for_disconnect())
+
+        await self.start_response(send, 200, {
+            'content-type': 'text/event-stream; charset=utf-8',
+            'cache-control': 'no-cache',
+            'x-accel-buffering': 'no'
+        }, headers)
+        try:
+            sent = headers.get('last-event-id')
+            started = last_write = time.monotonic()
+            await send({'type': 'http.response.body', 'body': f"retry: {int(poll * 1000)}\n\n".encode(), 'more_body': True})
+            while time.monotonic() - started < max_age:
+                rates = await self.current_rates()
+                etag = rates_etag(rates)
+                event = None
+                if etag != sent:
+                    event = f"id: {etag}\nevent: rates\ndata: {json.dumps(rates_payload(rates))}\n\n"
+                    sent = etag
+                elif time.monotonic() - last_write >= heartbeat:
+                    event = ": keep-alive\n\n"
+                if event:
+                    await send({'type': 'http.response.body', 'body': event.encode(), 'more_body': True})
+                    last_write = time.monotonic()
+                # Rate changes reach this process through the version file, so poll it
+                done, _ = await asyncio.wait([disconnected], timeout=poll)
+                if done:
+                    return
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+
+    async def current_rates(self):
+        rates = rates_cache.peek()
+        if rates is None:
+            rates = await asyncio.to_thread(self._load_rates)
+        return rates
+
+    def _load_rates(self):
+        with self.flask_app.app_context():
+            return rates_cache.get()
+
+    @staticmethod
+    def validators(etag, headers):
+        """(status, headers) for a response with this ETag: 304 if the client already has it"""
+        validator_headers = {'etag': f'"{etag}"', 'cache-control': 'no-cache'}
+        if etag and parse_etags(headers.get('if-none-match')).contains(etag):
+            return 304, validator_headers
+        return 200, validator_headers
+
+    async def get_rates(self, args, headers):
+        rates = await self.current_rates()
+        etag = rates_etag(rates)
+        status, response_headers = self.validators(etag, headers)
+        if status == 304:
+            return status, None, response_headers
+        response_headers['last-modified'] = http_date(max(rates.updated_at, rates.gst_updated_at))
+        return 200, rates_payload(rates), response_headers
+
+    async def get_categories(self, args, headers):
+        rates = await self.current_rates()
+        summaries = category_summaries.peek(rates)
+        if summaries is None:
+            key = category_summaries.key(rates)
+            async with self.sessions() as session:
+                rows = (await session.execute(category_summaries.statement(rates))).all()
+            summaries = category_summaries.summarize(rows)
+            category_summaries.set(key, summaries)
+        return 200, summaries, {}
+
+    async def get_products(self, args, headers):
+        rates = await self.current_rates()
+        etag = products_etag(rates)
+        response_headers = {'cache-control': 'no-cache'}
+        if etag:
+            status, response_headers = self.validators(etag, headers)
+            if status == 304:
+                return status, None, response_headers
+
+        listing = ProductListing(args, rates, self.config['MATERIALIZED_PRICING'])
+        async with self.sessions() as session:
+            products = (await session.scalars(listing.statement)).all()
+            return 200, listing.page(products), response_headers
+
+
+app = AsyncAPI(flask_app)
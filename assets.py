@@ -0,0 +1,90 @@
+import hashlib
+import os
+import threading
+
+from flask import request
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+
+# One year, the longest max-age caches honour
+IMMUTABLE_MAX_AGE = 31536000
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    """SHA-256 of a file's bytes, cached until its mtime or size changes"""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _digests.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _digests_lock:
+        _digests[path] = (key, digest)
+    return digest
+
+
+def pending_path(image_path):
+    """Where the raw upload waits until the image job writes image_path"""
+    return f"{image_path}.pending"
+
+
+def save_upload(file, folder):
+    """Store an uploaded image under a name derived from its content
+
+    Returns (path relative to static/, is_new). Identical bytes always map
+    to the same name, so an existing file (or one still being processed)
+    is reused instead of written again and nothing needs reprocessing.
+    """
+    return save_image_bytes(file.read(), file.filename, folder)
+
+
+def save_image_bytes(data, filename, folder):
+    """save_upload for image bytes from elsewhere, e.g. a ZIP of product images"""
+    ext = secure_filename(filename).rsplit('.', 1)[1].lower()
+    name = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+    relative_path = f'uploads/{folder}/{name}'
+    image_path = f'static/{relative_path}'
+
+    if os.path.exists(image_path) or os.path.exists(pending_path(image_path)):
+        return relative_path, False
+
+    with open(pending_path(image_path), 'wb') as f:
+        f.write(data)
+    return relative_path, True
+
+
+def init_app(app):
+    """Version static URLs by content hash and cache versioned responses forever"""
+
+    def static_version(filename):
+        path = safe_join(app.static_folder, filename)
+        return file_digest(path)[:12] if path and os.path.isfile(path) else None
+
+    @app.url_defaults
+    def add_static_version(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = static_version(values['filename'])
+            if version:
+                values['v'] = version
+
+    @app.after_request
+    def cache_versioned_static(response):
+        if request.endpoint != 'static' or 'v' not in request.args or response.status_code not in (200, 304):
+            return response
+        if request.args['v'] == static_version(request.view_args['filename']):
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        else:
+            # A stale or made-up version must not pin this content in caches
+            response.cache_control.no_cache = True
+        return response
@@ -0,0 +1,132 @@
+"""Synthetic catalogue for benchmarks: categories, products, rate history and images.
+
+The same size and seed always produce the same rows, so results from
+different runs (or branches) measure the same data.
+"""
+import io
+import random
+from datetime import datetime, timedelta
+
+from PIL import Image, ImageDraw
+from sqlalchemy import delete
+
+from assets import save_image_bytes
+from database import db, Category, GoldRate, GST, Product, ProductImage, RateDailySummary
+from image_jobs import image_jobs
+
+CATEGORIES = [
+    ('Ring', 'রিং'),
+    ('Chain', 'চেইন'),
+    ('Necklace', 'হার'),
+    ('Bangle', 'চুড়ি'),
+    ('Earring', 'কানের দুল'),
+    ('Pendant', 'লকেট'),
+    ('Bracelet', 'ব্রেসলেট'),
+    ('Nose Pin', 'নাকফুল'),
+    ('Anklet', 'নূপুর'),
+    ('Silver Items', 'সিলভার আইটেম')
+]
+
+STYLES = [
+    ('Antique', 'অ্যান্টিক'),
+    ('Bridal', 'ব্রাইডাল'),
+    ('Daily Wear', 'ডেইলি'),
+    ('Temple', 'টেম্পল'),
+    ('Kundan', 'কুন্দন'),
+    ('Filigree', 'ফিলিগ্রি'),
+    ('Light', 'হালকা'),
+    ('Classic', 'ক্লাসিক')
+]
+
+PURITIES = ['22K', '22K', '22K', '18K', '925 Silver']
+
+# Words the search benchmark looks up: whole words, prefixes and mixed scripts
+SEARCH_TERMS = ['হার', 'necklace 22K', 'kun', 'চুড়ি', 'bridal ring', 'টেম্পল হার', 'silver', 'anti']
+
+
+def dummy_image(rng, index):
+    """An 800px JPEG; small enough that reprocessing an existing copy changes nothing"""
+    color = (rng.randint(120, 255), rng.randint(90, 200), rng.randint(20, 90))
+    img = Image.new('RGB', (800, 800), color)
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((200, 200, 600, 600), outline=(255, 255, 255), width=24)
+    draw.text((360, 380), f"#{index}", fill=(255, 255, 255))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def clear_catalogue():
+    for model in (ProductImage, Product, Category, GoldRate, RateDailySummary, GST):
+        db.session.execute(delete(model))
+    db.session.commit()
+
+
+def seed(product_count, seed=42, image_count=12, rate_days=90, batch_size=5000):
+    """Replace the catalogue with product_count synthetic products
+
+    Also writes rate_days of hourly gold rates and image_count shared
+    images (processed like uploads, variants included). Returns the
+    number of products written.
+    """
+    rng = random.Random(seed)
+    clear_catalogue()
+
+    db.session.add_all([Category(id=i, name=name, name_bn=name_bn)
+                        for i, (name, name_bn) in enumerate(CATEGORIES, start=1)])
+    db.session.add(GST(percentage=3.0, updated_at=datetime.utcnow() - timedelta(days=rate_days)))
+
+    # Hourly random walk ending now; the last row is the current rate
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    gold, silver = 6450.0, 78.0
+    rates = []
+    for hour in range(rate_days * 24, -1, -1):
+        gold = round(max(5000.0, gold + rng.gauss(0, 8)), 2)
+        silver = round(max(50.0, silver + rng.gauss(0, 0.3)), 2)
+        rates.append({'gold_22k': gold, 'silver': silver, 'updated_at': now - timedelta(hours=hour)})
+    db.session.bulk_insert_mappings(GoldRate, rates)
+    db.session.commit()
+
+    image_paths = [save_image_bytes(dummy_image(rng, i), f'bench-{i}.jpg', 'products')[0]
+                   for i in range(image_count)]
+
+    products, images = [], []
+    for product_id in range(1, product_count + 1):
+        category_id = rng.randint(1, len(CATEGORIES))
+        category, category_bn = CATEGORIES[category_id - 1]
+        style, style_bn = rng.choice(STYLES)
+        purity = 'Silver' if category == 'Silver Items' else rng.choice(PURITIES)
+        created_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        products.append({
+            'id': product_id,
+            'name': f"{style} {category} {product_id}",
+            'name_bn': f"{style_bn} {category_bn} {product_id}",
+            'description_bn': f"{purity} {style_bn} {category_bn}, হাতে তৈরি নকশা",
+            'category_id': category_id,
+            'purity': purity,
+            'weight': round(rng.uniform(0.5, 60.0), 2),
+            'making_charge': float(rng.choice(range(300, 1201, 50))),
+            'stock_status': 'In Stock' if rng.random() < 0.85 else 'Out of Stock',
+            'images_status': 'ready',
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+        for position, path in enumerate(rng.sample(image_paths, rng.randint(1, 3))):
+            images.append({'product_id': product_id, 'position': position, 'path': path})
+
+        if len(products) >= batch_size:
+            db.session.bulk_insert_mappings(Product, products)
+            db.session.bulk_insert_mappings(ProductImage, images)
+            db.session.commit()
+            products, images = [], []
+    if products:
+        db.session.bulk_insert_mappings(Product, products)
+        db.session.bulk_insert_mappings(ProductImage, images)
+        db.session.commit()
+
+    # The job records size, hash and variants on every row sharing each file
+    if product_count:
+        futures = [image_jobs.submit_product(1, [f'static/{path}']) for path in image_paths]
+        for future in futures:
+            future.result()
+    return product_count
@@ -0,0 +1,66 @@
+"""Compare two benchmark result files from benchmarks.run.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+    python -m benchmarks.compare before.json after.json --fail-over 20
+
+Prints p50/p95/p99 and throughput changes per route and phase. With
+--fail-over, exits 1 if any p95 got slower by more than that percentage.
+"""
+import argparse
+import json
+import sys
+
+
+def change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def format_change(pct):
+    return '     n/a' if pct is None else f"{pct:+7.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--fail-over', type=float, help='fail if a p95 regresses by more than this percentage')
+    args = parser.parse_args()
+
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+
+    for label, report in (('before', before), ('after', after)):
+        meta = report['meta']
+        print(f"{label:6s} {meta['commit'] or '?':10s} {meta['database']:8s} {meta['products']} products, "
+              f"{meta['requests']} requests, concurrency {meta['concurrency']}")
+    if before['meta']['products'] != after['meta']['products']:
+        print("❌ Catalogue sizes differ; the numbers are not comparable")
+
+    regressions = []
+    print(f"\n{'route':34s} {'phase':11s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'req/s':>8s} {'queries':>8s}")
+    for route, phases in after['results'].items():
+        for phase, new in phases.items():
+            old = before['results'].get(route, {}).get(phase)
+            if old is None:
+                continue
+            p95 = change(old['p95_ms'], new['p95_ms'])
+            queries = (new['queries_per_request'] or 0) - (old['queries_per_request'] or 0)
+            print(f"{route:34s} {phase:11s} {format_change(change(old['p50_ms'], new['p50_ms']))} "
+                  f"{format_change(p95)} {format_change(change(old['p99_ms'], new['p99_ms']))} "
+                  f"{format_change(change(old['throughput_rps'], new['throughput_rps']))} {queries:+8.1f}")
+            if args.fail_over is not None and p95 is not None and p95 > args.fail_over:
+                regressions.append(f"{route} ({phase}): p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+
+    if regressions:
+        print(f"\n❌ p95 regressed by more than {args.fail_over}%:")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Compare the sync and async serving paths under many keep-alive clients.
+
+    python -m benchmarks.concurrency --products 1k
+    python -m benchmarks.concurrency --products 10k --clients 100,1000,3000 --duration 20
+
+Both servers run as a single process on a local port against the same
+catalogue (seeded like benchmarks.run):
+
+    sync    gunicorn -c gunicorn.conf.py app:app, gthread worker with --threads threads
+    async   uvicorn asgi:app
+
+Each client holds one keep-alive connection and sends GET requests back
+to back for --duration seconds. A request that gets no response within
+--timeout counts as an error. Latency runs from sending the request to
+reading the whole response, so time spent waiting for the server to
+accept the connection is included. Results (p50/p95/p99, throughput,
+errors) are printed and saved as JSON under benchmarks/results/.
+
+The load generator runs on the same machine as the server. On a small
+machine it takes CPU from the server, so compare the two paths with
+each other rather than with production numbers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.run import RESULTS_DIR, ROOT, WORKDIR, git_commit, parse_size, prepare_catalogue, summarize, use_database
+
+ROUTES = ['/api/rates', '/api/categories', '/api/products', '/api/products?sort=price&limit=20']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(kind, port, threads):
+    if kind == 'sync':
+        return [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'), '--workers', '1',
+                '--threads', str(threads), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+    return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+            '--backlog', '4096', '--timeout-keep-alive', '30', '--log-level', 'warning']
+
+
+def start_server(kind, threads):
+    port = free_port()
+    # Run in the benchmark workdir like this process, importing the app from the repo
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    server = subprocess.Popen(server_command(kind, port, threads), cwd=WORKDIR, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/rates', timeout=1) as response:
+                response.read()
+            return server, port
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError(f"{kind} server exited with code {server.returncode}")
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"{kind} server did not start within 30s")
+
+
+async def read_response(reader):
+    """(status, keep alive) after reading one whole response"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def client(port, paths, deadline, timeout, latencies, statuses):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        path = random.choice(paths)
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n'.encode())
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            statuses[599] += 1  # no response: connection refused, reset or timed out
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        latencies.append(time.perf_counter() - started)
+        statuses[status] += 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, paths, clients, duration, timeout):
+    latencies, statuses = [], Counter()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*[client(port, paths, deadline, timeout, latencies, statuses) for _ in range(clients)])
+    return summarize(latencies, time.perf_counter() - started, [], statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', default='1k', help='catalogue size (default: %(default)s)')
+    parser.add_argument('--db', help='database URI (its catalogue tables are replaced)')
+    parser.add_argument('--clients', default='100,1000,3000',
+                        help='concurrent keep-alive clients, comma separated (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per run (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=10, help='seconds before a request counts as failed')
+    parser.add_argument('--threads', type=int, default=32, help='sync server threads (default: %(default)s)')
+    parser.add_argument('--servers', default='sync,async', help='which paths to run (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for the data (default: %(default)s)')
+    parser.add_argument('--reseed', action='store_true', help='rebuild the catalogue even if it has the right size')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<time>-concurrency-<size>.json)')
+    args = parser.parse_args()
+
+    product_count = parse_size(args.products)
+    client_counts = [int(count) for count in args.clients.split(',')]
+    if args.output:
+        args.output = os.path.abspath(args.output)  # before use_database changes directory
+    use_database(args.db, product_count)
+    from app import app
+    from database import db
+
+    prepare_catalogue(app, product_count, args.seed, args.reseed)
+
+    results = {}
+    for kind in args.servers.split(','):
+        server, port = start_server(kind, args.threads)
+        try:
+            for clients in client_counts:
+                stats = asyncio.run(load(port, ROUTES, clients, args.duration, args.timeout))
+                results.setdefault(f'{clients} clients', {})[kind] = stats
+                print(f"{kind:5s} {clients:5d} clients  p50 {stats['p50_ms'] or 0:8.2f} ms  "
+                      f"p95 {stats['p95_ms'] or 0:8.2f} ms  p99 {stats['p99_ms'] or 0:8.2f} ms  "
+                      f"{stats['throughput_rps'] or 0:8.1f} req/s  {stats['errors']} errors")
+        finally:
+            server.terminate()
+            server.wait()
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    report = {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'database': dialect,
+            'products': product_count,
+            'requests': None,
+            'concurrency': args.clients,
+            'duration': args.duration,
+            'sync_threads': args.threads,
+            'routes': ROUTES
+        },
+        'results': results
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-concurrency-{product_count}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+"""Bulk product import from a CSV or XLSX sheet plus a ZIP of images.
+
+    python bulk_import.py products.csv [--images images.zip] [--errors errors.csv]
+
+The sheet needs a header row with the columns name, name_bn, category,
+purity, weight and making_charge, and may add description_bn,
+stock_status and images (file names inside the ZIP, separated by commas
+or semicolons). category is a category id, English name or Bengali name.
+
+Rows are read one at a time and inserted in chunks of IMPORT_BATCH_SIZE,
+one multi-row INSERT and one commit per chunk. Images are stored under
+content-hash names like admin uploads and optimized on the image job
+pool, IMAGE_WORKERS at a time. Rows that fail validation are skipped and
+listed in the report with their row number.
+"""
+import argparse
+import csv
+import io
+import os
+import threading
+import zipfile
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from assets import pending_path, save_image_bytes
+from database import db, Category, Product, ProductImage
+from image_jobs import image_jobs
+from pricing import calculate_prices
+from rates_cache import rates_cache
+
+REQUIRED_COLUMNS = ('name', 'name_bn', 'category', 'purity', 'weight', 'making_charge')
+SHEET_EXTENSIONS = ('csv', 'xlsx')
+
+
+def _normalize_header(header):
+    return [str(column or '').strip().lower() for column in header]
+
+
+def read_rows(stream, filename):
+    """Yield (row number, {column: value}) from a CSV or XLSX file, one row at a time
+
+    Row numbers match the spreadsheet, so the header is row 1.
+    """
+    ext = filename.rsplit('.', 1)[-1].lower()
+    if ext == 'csv':
+        reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    elif ext == 'xlsx':
+        import openpyxl
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        reader = workbook.active.iter_rows(values_only=True)
+    else:
+        raise ValueError(f"Unsupported sheet type: {filename} (use {' or '.join(SHEET_EXTENSIONS)})")
+
+    header = None
+    for row_number, values in enumerate(reader, start=1):
+        if header is None:
+            header = _normalize_header(values)
+            missing = [column for column in REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise ValueError(f"Missing columns: {', '.join(missing)}")
+            continue
+        if not any(value not in (None, '') for value in values):
+            continue  # blank line
+        yield row_number, {column: value for column, value in zip(header, values) if column}
+
+
+def category_lookup():
+    """Category id by id, English name (any case) and Bengali name"""
+    lookup = {}
+    for category in Category.query.all():
+        lookup[str(category.id)] = category.id
+        lookup[category.name.strip().lower()] = category.id
+        lookup[category.name_bn.strip()] = category.id
+    return lookup
+
+
+def archive_members(archive):
+    """ZIP members by file name, ignoring the folders they sit in"""
+    members = {}
+    if archive is not None:
+        for info in archive.infolist():
+            if not info.is_dir():
+                members[os.path.basename(info.filename)] = info
+    return members
+
+
+def _text(row, column, max_length=None, errors=None):
+    value = row.get(column)
+    value = '' if value is None else str(value).strip()
+    if max_length and len(value) > max_length:
+        errors.append(f"{column} is longer than {max_length} characters")
+    return value
+
+
+def _number(row, column, errors, positive=False):
+    try:
+        number = float(row.get(column))
+    except (TypeError, ValueError):
+        errors.append(f"{column} must be a number")
+        return None
+    if positive and number <= 0:
+        errors.append(f"{column} must be greater than 0")
+    elif number < 0:
+        errors.append(f"{column} must not be negative")
+    return number
+
+
+def validate_row(row, categories, members):
+    """Check one sheet row; returns (Product mapping, image file names, errors)"""
+    errors = []
+    mapping = {
+        'name': _text(row, 'name', 200, errors),
+        'name_bn': _text(row, 'name_bn', 200, errors),
+        'description_bn': _text(row, 'description_bn') or None,
+        'purity': _text(row, 'purity', 10, errors),
+        'stock_status': _text(row, 'stock_status', 20, errors) or 'In Stock',
+        'weight': _number(row, 'weight', errors, positive=True),
+        'making_charge': _number(row, 'making_charge', errors)
+    }
+    for column in ('name', 'name_bn', 'purity'):
+        if not mapping[column]:
+            errors.append(f"{column} is required")
+
+    category = _text(row, 'category')
+    if category.endswith('.0'):
+        category = category[:-2]  # XLSX ids arrive as floats
+    mapping['category_id'] = categories.get(category) or categories.get(category.lower())
+    if mapping['category_id'] is None:
+        errors.append(f"Unknown category: {category or '(blank)'}")
+
+    image_names = [name.strip() for name in _text(row, 'images').replace(';', ',').split(',') if name.strip()]
+    allowed = current_app.config['ALLOWED_IMAGE_EXTENSIONS']
+    for name in image_names:
+        info = members.get(os.path.basename(name))
+        if '.' not in name or name.rsplit('.', 1)[1].lower() not in allowed:
+            errors.append(f"Not an allowed image type: {name}")
+        elif info is None:
+            errors.append(f"Image not in the ZIP: {name}")
+        elif info.file_size > current_app.config['MAX_CONTENT_LENGTH']:
+            errors.append(f"Image too large: {name}")
+    return mapping, image_names, errors
+
+
+def _insert_products(mappings):
+    """Insert Product mappings in one statement and set each mapping's new id
+
+    Fetching the ids with RETURNING or lastrowid per row would turn the
+    insert into one statement per row on MySQL. The rows of a single
+    INSERT get consecutive ids instead: MySQL reports the first as the
+    statement's lastrowid, SQLite the last. A follow-up select checks the
+    range really holds these rows before anything refers to the ids.
+    """
+    products = Product.__table__
+    result = db.session.execute(insert(products).values(mappings))
+    if db.engine.dialect.name == 'sqlite':
+        first_id = result.lastrowid - len(mappings) + 1
+    else:
+        first_id = result.lastrowid
+    names = db.session.execute(
+        select(products.c.name)
+        .where(products.c.id.between(first_id, first_id + len(mappings) - 1))
+        .order_by(products.c.id)
+    ).scalars().all()
+    if names != [mapping['name'] for mapping in mappings]:
+        raise RuntimeError("Could not read back the new product ids")
+    for product_id, mapping in enumerate(mappings, first_id):
+        mapping['id'] = product_id
+
+
+def _insert_chunk(chunk, report, futures):
+    """Insert one chunk of (row number, mapping, [(path, is_new)]) and queue its images"""
+    if current_app.config['MATERIALIZED_PRICING']:
+        rates = rates_cache.get()
+        prices = calculate_prices(
+            [mapping['weight'] for _, mapping, _ in chunk],
+            [mapping['making_charge'] for _, mapping, _ in chunk],
+            rates.gold_22k,
+            rates.gst
+        )
+        for (_, mapping, _), price in zip(chunk, prices):
+            mapping['current_price'] = price
+
+    try:
+        _insert_products([mapping for _, mapping, _ in chunk])
+        image_rows = [
+            {'product_id': mapping['id'], 'position': position, 'path': path}
+            for _, mapping, images in chunk
+            for position, (path, _) in enumerate(images)
+        ]
+        # Reused files already have their size, hash and variants recorded
+        reused = {path for _, _, images in chunk for path, is_new in images if not is_new}
+        if reused:
+            known = {}
+            for image in ProductImage.query.filter(ProductImage.path.in_(reused), ProductImage.width.isnot(None)):
+                known[image.path] = {'width': image.width, 'height': image.height,
+                                     'content_hash': image.content_hash, 'variants': image.variants}
+            for image_row in image_rows:
+                image_row.update(known.get(image_row['path'], {}))
+        if image_rows:
+            db.session.bulk_insert_mappings(ProductImage, image_rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for row_number, _, images in chunk:
+            report['errors'].append({'row': row_number, 'errors': [f"Database error: {e}"]})
+            # Nothing refers to files first written for this chunk
+            for path, is_new in images:
+                if is_new and os.path.exists(pending_path(f'static/{path}')):
+                    os.remove(pending_path(f'static/{path}'))
+        report['failed'] += len(chunk)
+        return
+
+    report['imported'] += len(chunk)
+    for _, mapping, images in chunk:
+        new_paths = [f'static/{path}' for path, is_new in images if is_new]
+        if new_paths:
+            futures.append(image_jobs.submit_product(mapping['id'], new_paths))
+            report['images_queued'] += len(new_paths)
+
+
+def import_products(rows, archive=None, batch_size=500):
+    """Validate and insert sheet rows (see read_rows), storing their images from archive
+
+    Returns (report, futures): the report counts imported and failed rows
+    and lists each failed row's errors; futures are the queued image jobs.
+    """
+    report = {'imported': 0, 'failed': 0, 'images_queued': 0, 'errors': []}
+    futures = []
+    categories = category_lookup()
+    members = archive_members(archive)
+
+    chunk = []
+    for row_number, row in rows:
+        mapping, image_names, errors = validate_row(row, categories, members)
+        if errors:
+            report['errors'].append({'row': row_number, 'errors': errors})
+            report['failed'] += 1
+            continue
+
+        images = []
+        for name in image_names:
+            data = archive.read(members[os.path.basename(name)])
+            images.append(save_image_bytes(data, name, 'products'))
+        mapping['images_status'] = 'pending' if any(is_new for _, is_new in images) else 'ready'
+        chunk.append((row_number, mapping, images))
+
+        if len(chunk) >= batch_size:
+            _insert_chunk(chunk, report, futures)
+            chunk = []
+    if chunk:
+        _insert_chunk(chunk, report, futures)
+    return report, futures
+
+
+def when_all_done(futures, callback):
+    """Call callback once, after the last of futures finishes"""
+    if not futures:
+        callback()
+        return
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(future):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            callback()
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def write_error_report(report, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['row', 'error'])
+        for failure in report['errors']:
+            for error in failure['errors']:
+                writer.writerow([failure['row'], error])
+
+
+def main():
+    from config import Config
+    from migrate import create_migration_app
+    from page_cache import page_cache
+    from search_index import search_index
+
+    parser = argparse.ArgumentParser(description='Import products from a CSV/XLSX sheet and a ZIP of images')
+    parser.add_argument('sheet', help='CSV or XLSX file with one product per row')
+    parser.add_argument('--images', help='ZIP of the image files named in the images column')
+    parser.add_argument('--errors', help='write failed rows to this CSV file')
+    parser.add_argument('--batch-size', type=int, default=Config.IMPORT_BATCH_SIZE,
+                        help='rows per insert and commit (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=Config.IMAGE_WORKERS,
+                        help='images optimized in parallel (default: %(default)s)')
+    args = parser.parse_args()
+
+    app = create_migration_app()
+    app.config['IMAGE_WORKERS'] = args.workers
+    image_jobs.init_app(app)
+    page_cache.init_app(app)
+    search_index.init_app(app)
+
+    archive = zipfile.ZipFile(args.images) if args.images else None
+    with app.app_context(), open(args.sheet, 'rb') as sheet:
+        report, futures = import_products(read_rows(sheet, args.sheet), archive, args.batch_size)
+        print(f"✅ Imported {report['imported']} products ({report['images_queued']} new images)")
+
+        if futures:
+            print(f"Optimizing images with {args.workers} workers...")
+            image_jobs.shutdown(wait=True)
+            failed = sum(1 for future in futures if not future.result()[0])
+            if failed:
+                print(f"❌ {failed} products have images that failed to process")
+            else:
+                print("✅ Images processed")
+
+    # Tell running app workers to drop cached pages and rebuild their search index
+    page_cache.invalidate()
+    search_index.version_file.bump()
+
+    if report['failed']:
+        print(f"❌ {report['failed']} rows failed")
+        for failure in report['errors'][:20]:
+            print(f"   row {failure['row']}: {'; '.join(failure['errors'])}")
+        if len(report['errors']) > 20:
+            print(f"   ... and {len(report['errors']) - 20} more")
+        if args.errors:
+            write_error_report(report, args.errors)
+            print(f"Error report written to {args.errors}")
+
+
+if __name__ == '__main__':
+    main()
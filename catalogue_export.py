@@ -0,0 +1,101 @@
+"""Streaming catalogue export (NDJSON or CSV) with current prices.
+
+Products are read and priced one chunk at a time, paging by id like
+pricing.materialize_prices, and each chunk is dropped from the session
+once written, so memory use stays flat however large the catalogue
+grows. Each chunk is a complete query, so its image query never runs
+while an unbuffered MySQL result is still streaming. Column names match the ones bulk_import.py
+reads where the two overlap.
+"""
+import csv
+import io
+import json
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from database import db, Category, Product
+from pricing import price_products
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+COLUMNS = ['id', 'name', 'name_bn', 'description_bn', 'category', 'category_id', 'purity', 'weight',
+           'making_charge', 'stock_status', 'calculated_price', 'images', 'created_at', 'updated_at']
+
+
+def export_rows(rates, chunk_size=1000):
+    """Yield the catalogue as lists of row dicts (keys as COLUMNS), one chunk at a time"""
+    categories = {category.id: category.name for category in Category.query.all()}
+    materialized = current_app.config['MATERIALIZED_PRICING']
+    last_id = 0
+    while True:
+        products = db.session.scalars(
+            select(Product)
+            .options(selectinload(Product.images))
+            .where(Product.id > last_id)
+            .order_by(Product.id)
+            .limit(chunk_size)
+        ).all()
+        if not products:
+            break
+        last_id = products[-1].id
+
+        if materialized and all(p.current_price is not None for p in products):
+            prices = [p.current_price for p in products]
+        else:
+            prices = price_products(products, rates)
+
+        yield [
+            {
+                'id': product.id,
+                'name': product.name,
+                'name_bn': product.name_bn,
+                'description_bn': product.description_bn,
+                'category': categories.get(product.category_id),
+                'category_id': product.category_id,
+                'purity': product.purity,
+                'weight': product.weight,
+                'making_charge': product.making_charge,
+                'stock_status': product.stock_status,
+                'calculated_price': price,
+                'images': [image.path for image in product.images],
+                'created_at': product.created_at.isoformat() if product.created_at else None,
+                'updated_at': product.updated_at.isoformat() if product.updated_at else None
+            }
+            for product, price in zip(products, prices)
+        ]
+        for product in products:
+            db.session.expunge(product)  # and its images
+
+
+def ndjson_chunks(chunks):
+    for rows in chunks:
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+
+def csv_chunks(chunks):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, COLUMNS)
+    # The BOM makes Excel read the Bengali columns as UTF-8
+    buffer.write('\ufeff')
+    writer.writeheader()
+    for rows in chunks:
+        for row in rows:
+            writer.writerow(dict(row, images=';'.join(row['images'])))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()  # empty catalogue: header only
+
+
+def stream(export_format, rates, chunk_size=1000):
+    """Generator of response text for the export in export_format (a FORMATS key)"""
+    chunks = export_rows(rates, chunk_size)
+    if export_format == 'csv':
+        return csv_chunks(chunks)
+    return ndjson_chunks(chunks)
@@ -0,0 +1,124 @@
+import math
+import threading
+import time
+
+from sqlalchemy import case, func, select
+
+from database import db, Category, Product
+from page_cache import page_cache
+from pricing import price_expression
+
+
+class CategorySummaries:
+    """Categories with their product counts, weight range and price range.
+
+    One GROUP BY over categories LEFT JOIN products gives, per category,
+    the product count, the in-stock count, min/max weight and min/max
+    price at the current rates, so the homepage can show "23 items, from
+    ₹12,400" without a product query per category. Prices come from
+    price_expression, rounded up like calculate_price, which matches it
+    exactly on the DOUBLE weight and making_charge columns. With
+    MATERIALIZED_PRICING the stored current_price is used instead,
+    falling back to price_expression where it is still NULL.
+
+    The list is cached per worker under the page cache's data version,
+    which every product, category and rate write bumps, and the rates it
+    was priced at. Entries also expire after a TTL, like PageCache.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self.materialized = False
+        self.hits = 0
+        self.misses = 0
+        self._entry = None  # (key, monotonic time stored, summaries)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('CATEGORY_SUMMARY_TTL', self.ttl)
+        self.materialized = app.config.get('MATERIALIZED_PRICING', False)
+        app.extensions['category_summaries'] = self
+
+    def statement(self, rates):
+        """The aggregate query; rows are (Category, count, in stock, min/max weight, min/max price)"""
+        price = price_expression(rates)
+        if self.materialized:
+            # Rows init-db has not backfilled yet have no stored price
+            price = func.coalesce(Product.current_price, price)
+        return (
+            select(
+                Category,
+                func.count(Product.id),
+                func.sum(case((Product.stock_status == 'In Stock', 1), else_=0)),
+                func.min(Product.weight),
+                func.max(Product.weight),
+                func.min(price),
+                func.max(price)
+            )
+            .outerjoin(Product, Product.category_id == Category.id)
+            .group_by(Category.id)
+            .order_by(Category.id)
+        )
+
+    @staticmethod
+    def summarize(rows):
+        """Category.to_dict() plus the aggregates for each row of statement()"""
+        summaries = []
+        for category, count, in_stock, min_weight, max_weight, min_price, max_price in rows:
+            summary = category.to_dict()
+            summary.update({
+                'product_count': count,
+                'in_stock_count': int(in_stock or 0),  # MySQL sums to a Decimal
+                'min_weight': min_weight,
+                'max_weight': max_weight,
+                'min_price': math.ceil(min_price) if min_price is not None else None,
+                'max_price': math.ceil(max_price) if max_price is not None else None
+            })
+            summaries.append(summary)
+        return summaries
+
+    def key(self, rates):
+        """Cache key for these rates; take it before querying so a concurrent write is not missed"""
+        return page_cache.data_version(), rates.updated_at, rates.gst_updated_at
+
+    def peek(self, rates):
+        """Return the cached summaries for these rates if fresh, else None; never queries the database"""
+        entry = self._entry
+        if entry is not None and entry[0] == self.key(rates) and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[2]
+        return None
+
+    def set(self, key, summaries):
+        """Store summaries queried after reading key (a cache miss)"""
+        self.misses += 1
+        self._entry = (key, time.monotonic(), summaries)
+
+    def get(self, rates):
+        """Return the summaries priced at these rates, querying only when stale"""
+        summaries = self.peek(rates)
+        if summaries is not None:
+            return summaries
+
+        with self._lock:
+            summaries = self.peek(rates)
+            if summaries is not None:
+                return summaries
+            key = self.key(rates)
+            summaries = self.summarize(db.session.execute(self.statement(rates)).all())
+            self.set(key, summaries)
+            return summaries
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'cached': self._entry is not None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+category_summaries = CategorySummaries()
@@ -0,0 +1,92 @@
+"""Database setup commands, kept out of app startup so workers boot without touching the database.
+
+    flask --app app init-db    create the tables, apply pending migrations and, with
+                               MATERIALIZED_PRICING on, fill in missing stored prices
+    flask --app app seed       add the default rates, GST and categories to an empty database
+
+Run both once per deploy, before starting the workers. Each is safe to
+run again: tables and migrations are only added when missing, and seed
+only fills tables that are empty.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from database import db, GoldRate, GST, Category, Product
+import migrations
+from page_cache import page_cache
+from pricing import materialize_prices
+from rates_cache import rates_cache
+from search_index import search_index
+
+DEFAULT_CATEGORIES = [
+    ('Ring', 'রিং'),
+    ('Chain', 'চেইন'),
+    ('Necklace', 'হার'),
+    ('Bangle', 'চুড়ি'),
+    ('Silver Items', 'সিলভার আইটেম')
+]
+
+
+def init_db():
+    db.create_all(bind_key=None)  # the primary only; replicas get their tables through replication
+    print("✅ Database tables created successfully!")
+
+    # create_all() never alters existing tables; migrations add newer columns and indexes
+    if not migrations.upgrade(db.engine):
+        print("✅ Database schema is up to date")
+
+    # Turning MATERIALIZED_PRICING on for an existing catalogue: price filters and the
+    # price sort read current_price, so fill it in before the workers start using it
+    if current_app.config['MATERIALIZED_PRICING'] and Product.query.filter(Product.current_price.is_(None)).first():
+        count = materialize_prices(rates_cache.get())
+        page_cache.invalidate()
+        print(f"✅ Materialized prices for {count} products")
+
+
+def seed_defaults():
+    config = current_app.config
+
+    if GoldRate.query.count() == 0:
+        db.session.add(GoldRate(gold_22k=config['DEFAULT_GOLD_RATE'], silver=config['DEFAULT_SILVER_RATE']))
+        print("✅ Default gold rate added!")
+
+    if GST.query.count() == 0:
+        db.session.add(GST(percentage=config['DEFAULT_GST']))
+        print("✅ Default GST added!")
+
+    if Category.query.count() == 0:
+        db.session.add_all([Category(name=name, name_bn=name_bn, image=None)
+                            for name, name_bn in DEFAULT_CATEGORIES])
+        print("✅ Default categories added!")
+
+    db.session.commit()
+    print("✅ All default data initialized!")
+    rates_cache.invalidate()
+
+    if config['MATERIALIZED_PRICING']:
+        materialize_prices(rates_cache.get())
+        print("✅ Materialized product prices!")
+
+    # Tell running workers to drop cached pages and rebuild their search index
+    page_cache.invalidate()
+    search_index.version_file.bump()
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the tables and apply pending migrations."""
+    init_db()
+
+
+@click.command('seed')
+@with_appcontext
+def seed_command():
+    """Add the default rates, GST and categories where missing."""
+    seed_defaults()
+
+
+def init_app(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(seed_command)
@@ -1,8 +1,41 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from read_replicas import RoutingSession
 from datetime import datetime
+import json
 import pymysql
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def pool_options(uri, config):
+    """Engine options for one database; size, overflow and timeout only apply to a QueuePool"""
+    options = {'pool_recycle': config['SQLALCHEMY_POOL_RECYCLE']}
+    url = make_url(uri)
+    if issubclass(url.get_dialect().get_pool_class(url), QueuePool):  # not in-memory SQLite
+        options.update(
+            pool_size=config['SQLALCHEMY_POOL_SIZE'],
+            max_overflow=config['SQLALCHEMY_MAX_OVERFLOW'],
+            pool_timeout=config['SQLALCHEMY_POOL_TIMEOUT']
+        )
+    return options
+
+def init_engines(app):
+    """db.init_app with the SQLALCHEMY_POOL_* settings applied to the primary and each bind
+
+    Flask-SQLAlchemy 3 ignores those keys, and SQLALCHEMY_ENGINE_OPTIONS
+    would give every engine the same options whatever its pool class.
+    """
+    config = app.config
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **pool_options(config['SQLALCHEMY_DATABASE_URI'], config),
+        **config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    config['SQLALCHEMY_BINDS'] = {
+        key: {'url': value, **pool_options(value, config)} if isinstance(value, str) else value
+        for key, value in config.get('SQLALCHEMY_BINDS', {}).items()
+    }
+    db.init_app(app)
 
 class GoldRate(db.Model):
     __tablename__ = 'gold_rates'
@@ -10,7 +43,7 @@ class GoldRate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     gold_22k = db.Column(db.Float, nullable=False)
     silver = db.Column(db.Float, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def to_dict(self):
         return {
@@ -24,7 +57,7 @@ class GST(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     percentage = db.Column(db.Float, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def to_dict(self):
         return {
@@ -32,6 +65,24 @@ class GST(db.Model):
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
+class RateDailySummary(db.Model):
+    """One day of GoldRate rows rolled up by the retention job (see rate_history.py)"""
+    __tablename__ = 'rate_daily_summaries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, unique=True)
+    opened_at = db.Column(db.DateTime, nullable=False)  # first rate of the day
+    closed_at = db.Column(db.DateTime, nullable=False)  # last rate of the day
+    gold_open = db.Column(db.Float, nullable=False)
+    gold_high = db.Column(db.Float, nullable=False)
+    gold_low = db.Column(db.Float, nullable=False)
+    gold_close = db.Column(db.Float, nullable=False)
+    silver_open = db.Column(db.Float, nullable=False)
+    silver_high = db.Column(db.Float, nullable=False)
+    silver_low = db.Column(db.Float, nullable=False)
+    silver_close = db.Column(db.Float, nullable=False)
+    samples = db.Column(db.Integer, nullable=False)  # raw rows rolled into this day
+
 class Category(db.Model):
     __tablename__ = 'categories'
     
@@ -60,30 +111,89 @@ class Product(db.Model):
     description_bn = db.Column(db.Text)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     purity = db.Column(db.String(10), nullable=False)  # 22K, 18K, etc.
-    weight = db.Column(db.Float, nullable=False)
-    making_charge = db.Column(db.Float, nullable=False)
+    # Double precision, so SQL sees the same values as Python (see migration 5)
+    weight = db.Column(db.Double, nullable=False, index=True)
+    making_charge = db.Column(db.Double, nullable=False)
     stock_status = db.Column(db.String(20), default='In Stock')
-    images = db.Column(db.Text)  # Comma separated image paths
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    current_price = db.Column(db.Integer, index=True)  # Materialized price, see pricing.materialize_prices
+    images_status = db.Column(db.String(20), default='ready')  # pending/ready/failed, see image_jobs
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Category listings filter on category/stock and page by id
+    __table_args__ = (
+        db.Index('ix_products_category_stock_id', 'category_id', 'stock_status', 'id'),
+    )
     
     category = db.relationship('Category', backref=db.backref('products', lazy=True))
+    images = db.relationship('ProductImage', order_by='ProductImage.position',
+                             cascade='all, delete-orphan', back_populates='product')
+    # Just the first image, for listings that show one photo per product
+    primary_image = db.relationship('ProductImage', uselist=False, viewonly=True,
+                                    primaryjoin='and_(ProductImage.product_id == Product.id, ProductImage.position == 0)')
     
-    def to_dict(self):
-        images_list = []
-        if self.images:
-            images_list = [img.strip() for img in self.images.split(',') if img.strip()]
+    # to_dict() keys and the column each one is read from
+    DICT_COLUMNS = {
+        'id': 'id',
+        'name': 'name',
+        'name_bn': 'name_bn',
+        'description': 'description_bn',
+        'category_id': 'category_id',
+        'purity': 'purity',
+        'weight': 'weight',
+        'making_charge': 'making_charge',
+        'stock_status': 'stock_status',
+        'created_at': 'created_at'
+    }
+    # to_dict() keys read from ProductImage rows; load them with selectinload
+    DICT_RELATIONSHIPS = {
+        'images': 'images',
+        'primary_image': 'primary_image'
+    }
+    DEFAULT_DICT_FIELDS = list(DICT_COLUMNS) + ['images']
+    
+    def to_dict(self, fields=None):
+        """Serialize the product; pass fields to include only those keys"""
+        if fields is None:
+            fields = self.DEFAULT_DICT_FIELDS
         
-        return {
-            'id': self.id,
-            'name': self.name,
-            'name_bn': self.name_bn,
-            'description': self.description_bn,
-            'category_id': self.category_id,
-            'purity': self.purity,
-            'weight': self.weight,
-            'making_charge': self.making_charge,
-            'stock_status': self.stock_status,
-            'images': images_list,
-            'created_at': self.created_at.strftime('%Y-%m-%d') if self.created_at else None
-        }
+        data = {}
+        for field in fields:
+            if field == 'images':
+                value = [image.path for image in self.images]
+            elif field == 'primary_image':
+                value = self.primary_image.path if self.primary_image else None
+            else:
+                value = getattr(self, self.DICT_COLUMNS[field])
+                if field == 'created_at':
+                    value = value.strftime('%Y-%m-%d') if value else None
+            data[field] = value
+        return data
+
+class ProductImage(db.Model):
+    __tablename__ = 'product_images'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)  # 0 is the primary image
+    path = db.Column(db.String(500), nullable=False, index=True)  # relative to static/
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    content_hash = db.Column(db.String(64))  # sha256 of the processed file
+    variants = db.Column(db.Text)  # JSON {"sizes": {...}, "formats": [...]} once generated
+    
+    __table_args__ = (
+        db.Index('ix_product_images_product_position', 'product_id', 'position'),
+    )
+    
+    product = db.relationship('Product', back_populates='images')
+    
+    def variant_info(self):
+        return json.loads(self.variants) if self.variants else None
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
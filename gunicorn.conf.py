@@ -0,0 +1,26 @@
+"""Gunicorn settings: gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master and forked into the workers, so
+templates, config and compiled code are shared copy-on-write instead of
+loaded per worker. create_app() opens no connections and starts no
+threads, which is what makes preloading safe.
+
+These are gthread workers: every request, and every open rate stream,
+holds one of the worker's threads. Leave RATES_STREAM_ENABLED off here;
+to push live rates, serve the app with uvicorn asgi:app, which holds
+streams on its event loop.
+"""
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the collector's reach; otherwise each
+    # collection in a worker writes to their headers and un-shares the pages
+    gc.freeze()
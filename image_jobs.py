@@ -0,0 +1,262 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps, features
+
+from assets import file_digest, pending_path
+from database import db, Product, ProductImage
+from metrics import metrics
+
+
+def save_atomically(img, output_path, pil_format=None, **options):
+    """Save through a temporary file so readers never see a half-written image
+
+    Uploads and variants are served as immutable, so a truncated file left
+    by a crash would stay cached for good.
+    """
+    directory, name = os.path.split(output_path)
+    tmp_path = os.path.join(directory, f".{os.getpid()}.{threading.get_ident()}.{name}")
+    try:
+        img.save(tmp_path, pil_format, **options)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def optimize_image(image_path, max_size=(800, 800), output_path=None):
+    """Optimize image size, optionally writing the result to output_path"""
+    output_path = output_path or image_path
+    try:
+        with Image.open(image_path) as img:
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            save_atomically(img, output_path, optimize=True, quality=85)
+        return True
+    except Exception as e:
+        print(f"Image optimization error: {e}")
+        return False
+
+
+# File extension -> (Pillow format, MIME type, save options)
+VARIANT_FORMATS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 60}),
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def supported_formats(formats):
+    """Drop formats this Pillow build cannot encode (AVIF needs libavif)"""
+    return [ext for ext in formats
+            if ext == 'jpg' or features.check(VARIANT_FORMATS[ext][0].lower())]
+
+
+def variant_path(image_path, variant, ext):
+    """uploads/products/ring.jpg -> uploads/products/ring_card.webp"""
+    return f"{os.path.splitext(image_path)[0]}_{variant}.{ext}"
+
+
+def make_variants(image_path, sizes, formats, output_path=None):
+    """Write a downscaled copy of the image for every size and format
+
+    Sizes at or above the image's larger side are skipped rather than
+    upscaled. Variant names are derived from output_path (default
+    image_path). Returns {variant: width in px actually written}, or None
+    on error.
+    """
+    output_path = output_path or image_path
+    written = {}
+    try:
+        with Image.open(image_path) as original:
+            img = ImageOps.exif_transpose(original)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+            
+            # Largest first so each size is resampled from the previous one
+            for variant, size in sorted(sizes.items(), key=lambda item: -item[1]):
+                if size >= max(img.size):
+                    continue
+                img = img.copy()
+                img.thumbnail((size, size), Image.Resampling.LANCZOS)
+                for ext in formats:
+                    pil_format, _, options = VARIANT_FORMATS[ext]
+                    out = img.convert('RGB') if pil_format == 'JPEG' else img
+                    save_atomically(out, variant_path(output_path, variant, ext), pil_format, **options)
+                written[variant] = img.width
+        return written
+    except Exception as e:
+        print(f"Image variant error: {e}")
+        return None
+
+
+def variant_sources(image_path, static_folder, sizes, formats):
+    """Return [(mime type, [(variant path, width), ...])] for an image's variants
+
+    Widths are read from the variant files, since small images skip the
+    larger sizes. Empty when no variants were generated (older or small
+    uploads, or a job still pending), so callers fall back to the plain
+    image.
+    """
+    formats = supported_formats(formats)
+    widths = []
+    for variant, _ in sorted(sizes.items(), key=lambda item: item[1]):
+        path = os.path.join(static_folder, variant_path(image_path, variant, formats[-1]))
+        if os.path.exists(path):
+            with Image.open(path) as img:
+                widths.append((variant, img.width))
+    return [
+        (VARIANT_FORMATS[ext][1], [(variant_path(image_path, variant, ext), width) for variant, width in widths])
+        for ext in formats
+    ] if widths else []
+
+
+class ImageJobQueue:
+    """Runs image optimization on a local thread pool, off the request path.
+
+    Product uploads are marked Product.images_status = 'pending' by the
+    caller; the job flips it to 'ready' (or 'failed') once every image has
+    been processed.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.max_workers = 2
+        self.sizes = {}
+        self.formats = []
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = app.config.get('IMAGE_WORKERS', self.max_workers)
+        self.sizes = app.config.get('IMAGE_VARIANTS', self.sizes)
+        self.formats = supported_formats(app.config.get('IMAGE_VARIANT_FORMATS', ['jpg']))
+        app.extensions['image_jobs'] = self
+
+    @property
+    def executor(self):
+        # Created on first use so a preloaded master process forks no threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='image-job')
+        return self._executor
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            self._pending += 1
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit_images(self, image_paths):
+        """Optimize images that no database row tracks (e.g. category images)"""
+        return self._submit(self._process, image_paths)
+
+    def submit_product(self, product_id, image_paths):
+        """Optimize a product's images and mark the product ready when done"""
+        return self._submit(self._process_product, product_id, image_paths)
+
+    def stats(self):
+        return {
+            'pending': self._pending,
+            'workers': self.max_workers
+        }
+
+    def _process(self, image_paths, processed=None):
+        """Process each image; details of the ones that succeed go in processed[path]"""
+        started = time.perf_counter()
+        ok = True
+        for path in image_paths:
+            image_started = time.perf_counter()
+            # New uploads wait in a .pending file so the final name only
+            # ever holds processed bytes (it is served as immutable)
+            source = pending_path(path)
+            if not os.path.exists(source):
+                source = path
+            
+            # Variants come from the full-size upload, before it is shrunk
+            variants = make_variants(source, self.sizes, self.formats, output_path=path) if self.sizes else {}
+            image_ok = variants is not None
+            if optimize_image(source, output_path=path):
+                if source != path:
+                    os.remove(source)
+                if processed is not None:
+                    with Image.open(path) as img:
+                        width, height = img.size
+                    processed[path] = {
+                        'width': width,
+                        'height': height,
+                        'content_hash': file_digest(path),
+                        # The widths written, for srcset w descriptors
+                        'variants': json.dumps({'sizes': variants, 'formats': self.formats}) if variants else None
+                    }
+            else:
+                image_ok = False
+            ok = ok and image_ok
+            metrics.image_seconds.observe(time.perf_counter() - image_started, 'ok' if image_ok else 'failed')
+        return ok, time.perf_counter() - started
+
+    def _process_product(self, product_id, image_paths):
+        processed = {}
+        ok, elapsed = self._process(image_paths, processed)
+        with self.app.app_context():
+            try:
+                # Every row sharing the (content-addressed) file gets the details
+                for path, details in processed.items():
+                    relative_path = path[len('static/'):]
+                    ProductImage.query.filter_by(path=relative_path).update(details)
+                
+                product = db.session.get(Product, product_id)
+                if product:
+                    product.images_status = 'ready' if ok else 'failed'
+                    db.session.commit()
+            except Exception as e:
+                print(f"Image job error for product {product_id}: {e}")
+                db.session.rollback()
+        return ok, elapsed
+
+    def sources(self, image, static_folder):
+        """Responsive variants of an image path or ProductImage, see variant_sources
+
+        A ProductImage records its variants, so no file system check is needed.
+        """
+        if isinstance(image, ProductImage):
+            info = image.variant_info()
+            if not info:
+                return []
+            by_width = sorted(info['sizes'].items(), key=lambda item: item[1])
+            return [
+                (VARIANT_FORMATS[ext][1], [(variant_path(image.path, variant, ext), width) for variant, width in by_width])
+                for ext in info['formats']
+            ]
+        if not self.sizes:
+            return []
+        return variant_sources(image, static_folder, self.sizes, self.formats)
+
+    def remove(self, image_path):
+        """Delete an uploaded image and any variants generated from it"""
+        paths = [image_path, pending_path(image_path)] + [variant_path(image_path, variant, ext)
+                                for variant in self.sizes for ext in VARIANT_FORMATS]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+image_jobs = ImageJobQueue()
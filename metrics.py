@@ -0,0 +1,245 @@
+import bisect
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from database import db
+
+# Latency buckets in seconds, from a page cache hit to a slow admin write
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# stats() keys that only ever grow, exposed as counters
+LOOKUP_COUNTERS = {
+    'hits': 'lookups served from memory',
+    'misses': 'lookups that had to load or render'
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts (last is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                label_text = _labels(self.labelnames, labels, [('le', _number(bound))])
+                lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class Metrics:
+    """Request, SQL, connection pool, image job and cache metrics for /metrics.
+
+    Collected by before/after_request hooks and SQLAlchemy engine/pool
+    events: a few clock reads and dictionary updates per request and per
+    statement. Cache and pool figures are read when /metrics is scraped,
+    from the stats() of page_cache, rates_cache, category_summaries,
+    search_index, image_jobs and read_replicas in app.extensions.
+
+    Values are per worker process; each scrape sees the worker that
+    answered it, like the in-process caches.
+    """
+
+    STATS_EXTENSIONS = ('page_cache', 'rates_cache', 'category_summaries', 'search_index', 'image_jobs', 'read_replicas')
+
+    def __init__(self, app=None):
+        self.app = None
+        self.request_seconds = Histogram(
+            'http_request_duration_seconds', 'Request latency by Flask endpoint.', ['endpoint', 'method'])
+        self.requests = Counter(
+            'http_requests_total', 'Requests by Flask endpoint, method and status.', ['endpoint', 'method', 'status'])
+        self.request_queries = Histogram(
+            'http_request_db_queries', 'SQL statements per request.', ['endpoint'],
+            buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+        self.request_db_seconds = Histogram(
+            'http_request_db_duration_seconds', 'Time spent executing SQL per request.', ['endpoint'])
+        self.queries = Counter('db_queries_total', 'SQL statements executed, in or out of requests.')
+        self.query_seconds = Counter('db_query_duration_seconds_total', 'Time spent executing SQL.')
+        self.pool_wait = Histogram(
+            'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled database connection.',
+            buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+        self.image_seconds = Histogram(
+            'image_processing_duration_seconds', 'Time to optimize one uploaded image and write its variants.',
+            ['status'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+        self.started_at = time.time()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        with app.app_context():
+            for engine in db.engines.values():  # the primary and any read replicas
+                self.watch_engine(engine)
+        app.extensions['metrics'] = self
+
+    # Requests
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_seconds = 0.0
+
+    def _record(self, status):
+        if g.get('metrics_recorded') or 'metrics_started' not in g:
+            return
+        g.metrics_recorded = True
+        endpoint = request.endpoint or 'unmatched'
+        self.request_seconds.observe(time.perf_counter() - g.metrics_started, endpoint, request.method)
+        self.requests.inc(endpoint, request.method, str(status))
+        self.request_queries.observe(g.metrics_queries, endpoint)
+        self.request_db_seconds.observe(g.metrics_db_seconds, endpoint)
+
+    def _after_request(self, response):
+        self._record(response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request does not run when a view raises
+        if exc is not None:
+            self._record(500)
+
+    # SQL and the connection pool
+
+    def watch_engine(self, engine):
+        """Count and time an engine's statements and pool checkouts (asgi.py adds its async engine)"""
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info['metrics_started'].pop()
+            self.queries.inc()
+            self.query_seconds.inc(amount=elapsed)
+            if has_request_context() and 'metrics_queries' in g:
+                g.metrics_queries += 1
+                g.metrics_db_seconds += elapsed
+
+        @event.listens_for(engine, 'engine_disposed')
+        def disposed(engine):
+            self._time_checkouts(engine.pool)  # dispose() replaced the pool
+
+        self._time_checkouts(engine.pool)
+
+    def _time_checkouts(self, pool):
+        # Pools have no "checkout requested" event; time the pool's own fetch instead
+        do_get = pool._do_get
+
+        def timed_do_get():
+            started = time.perf_counter()
+            try:
+                return do_get()
+            finally:
+                self.pool_wait.observe(time.perf_counter() - started)
+
+        pool._do_get = timed_do_get
+
+    # Exposition
+
+    def _gauges(self):
+        """(name, type, help, value) read at scrape time"""
+        gauges = []
+        with self.app.app_context():
+            pool = db.engine.pool
+        for attribute, name, documentation in (
+                ('size', 'db_pool_size', 'Connections the pool keeps open.'),
+                ('checkedout', 'db_pool_checked_out', 'Pooled connections in use.'),
+                ('overflow', 'db_pool_overflow', 'Connections open beyond the pool size.')):
+            if hasattr(pool, attribute):
+                # QueuePool counts overflow from -size until the pool is full
+                gauges.append((name, 'gauge', documentation, max(getattr(pool, attribute)(), 0)))
+
+        for extension in self.STATS_EXTENSIONS:
+            stats = getattr(self.app.extensions.get(extension), 'stats', None)
+            if stats is None:
+                continue
+            for key, value in stats().items():
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                if key in LOOKUP_COUNTERS:
+                    gauges.append((f'{extension}_{key}_total', 'counter',
+                                   f'{extension} {LOOKUP_COUNTERS[key]}.', value))
+                else:
+                    gauges.append((f'{extension}_{key}', 'gauge', f'{extension} {key.replace("_", " ")}.', value))
+
+        gauges.append(('process_start_time_seconds', 'gauge', 'Start time of this worker since the epoch.',
+                       self.started_at))
+        return gauges
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in (self.request_seconds, self.requests, self.request_queries, self.request_db_seconds,
+                       self.queries, self.query_seconds, self.pool_wait, self.image_seconds):
+            lines.extend(metric.render())
+        for name, metric_type, documentation, value in self._gauges():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.append(f'{name} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
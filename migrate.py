@@ -0,0 +1,88 @@
+"""Apply schema migrations.
+
+    python migrate.py             apply pending migrations
+    python migrate.py --status    list applied and pending migrations
+    python migrate.py --explain   show EXPLAIN plans for the hot queries
+                                  before and after applying migrations
+
+Uses DATABASE_URI like the app does. Builds its own minimal Flask app so
+that importing it does not run the app's startup code.
+"""
+import argparse
+
+from flask import Flask
+from sqlalchemy import select
+
+from config import Config
+from database import db, init_engines, GoldRate, GST, Product
+import migrations
+from read_replicas import read_replicas
+
+
+def create_migration_app():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_engines(app)
+    read_replicas.init_app(app)  # writes keep the app's reads on the primary until replicas catch up
+    return app
+
+
+def hot_queries():
+    """The lookups every public request makes, as (label, statement)"""
+    return [
+        ('latest gold rate', select(GoldRate).order_by(GoldRate.updated_at.desc()).limit(1)),
+        ('latest GST', select(GST).order_by(GST.updated_at.desc()).limit(1)),
+        ('products page in a category',
+         select(Product.id).where(Product.category_id == 1)
+         .order_by(Product.category_id, Product.id).limit(51)),
+        ('in-stock products in a category',
+         select(Product.id).where(Product.category_id == 1, Product.stock_status == 'In Stock')
+         .order_by(Product.id).limit(51)),
+        ('last product change', select(Product.updated_at).order_by(Product.updated_at.desc()).limit(1)),
+    ]
+
+
+def explain(engine):
+    prefix = 'EXPLAIN QUERY PLAN' if engine.dialect.name == 'sqlite' else 'EXPLAIN'
+    with engine.connect() as conn:
+        for label, stmt in hot_queries():
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+            print(f"-- {label}")
+            result = conn.exec_driver_sql(f"{prefix} {sql}")
+            columns = list(result.keys())
+            for row in result:
+                print('   ', dict(zip(columns, row)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--status', action='store_true', help='list applied and pending migrations')
+    parser.add_argument('--explain', action='store_true', help='show query plans before and after migrating')
+    args = parser.parse_args()
+
+    app = create_migration_app()
+    with app.app_context():
+        db.create_all(bind_key=None)  # the primary only; replicas get their tables through replication
+        engine = db.engine
+
+        if args.status:
+            applied = migrations.applied_versions(engine)
+            for version, description, _ in migrations.MIGRATIONS:
+                state = 'applied' if version in applied else 'pending'
+                print(f"{version:4d}  {state:8s} {description}")
+            return
+
+        if args.explain:
+            print("=" * 20, "BEFORE", "=" * 20)
+            explain(engine)
+
+        if not migrations.upgrade(engine):
+            print("✅ Database schema is up to date")
+
+        if args.explain:
+            print("=" * 20, "AFTER", "=" * 20)
+            explain(engine)
+
+
+if __name__ == '__main__':
+    main()
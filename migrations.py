@@ -0,0 +1,163 @@
+"""Versioned schema migrations.
+
+db.create_all() only creates missing tables; it never adds columns or
+indexes to tables that already exist. Each migration below brings an
+existing database up to the models in database.py and is recorded in the
+schema_migrations table once applied. Steps check what already exists,
+so they are also safe on a fresh database built by create_all().
+
+Run `python migrate.py` to apply pending migrations.
+"""
+import os
+from datetime import datetime
+
+from PIL import Image
+from sqlalchemy import Double, bindparam, inspect, select, update
+
+from assets import file_digest
+from database import db, GoldRate, GST, Product, ProductImage, RateDailySummary, SchemaMigration
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a migration; versions must be applied in increasing order"""
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def add_column_if_missing(conn, column):
+    table = column.table.name
+    existing = {col['name'] for col in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return False
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {column.name} {column_type}')
+    return True
+
+
+def create_index_if_missing(conn, index):
+    existing = {idx['name'] for idx in inspect(conn).get_indexes(index.table.name)}
+    if index.name in existing:
+        return False
+    index.create(bind=conn)
+    return True
+
+
+def model_index(model, *column_names):
+    """The Index declared on a model for exactly these columns"""
+    for index in model.__table__.indexes:
+        if tuple(col.name for col in index.columns) == column_names:
+            return index
+    raise LookupError(f"No index on {model.__tablename__}{column_names}")
+
+
+@migration(1, 'Add products.current_price, products.images_status and the price/sort indexes')
+def add_product_pricing_columns(conn):
+    add_column_if_missing(conn, Product.__table__.c.current_price)
+    add_column_if_missing(conn, Product.__table__.c.images_status)
+    create_index_if_missing(conn, model_index(Product, 'current_price'))
+    create_index_if_missing(conn, model_index(Product, 'weight'))
+    create_index_if_missing(conn, model_index(Product, 'created_at'))
+
+
+@migration(2, 'Index rate history and product lookup columns')
+def add_lookup_indexes(conn):
+    create_index_if_missing(conn, model_index(GoldRate, 'updated_at'))
+    create_index_if_missing(conn, model_index(GST, 'updated_at'))
+    create_index_if_missing(conn, model_index(Product, 'category_id', 'stock_status', 'id'))
+    create_index_if_missing(conn, model_index(Product, 'updated_at'))
+
+
+@migration(3, 'Add rate_daily_summaries for rolled-up rate history')
+def add_rate_daily_summaries(conn):
+    RateDailySummary.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(4, 'Move comma-separated products.images into product_images rows')
+def add_product_images(conn):
+    ProductImage.__table__.create(bind=conn, checkfirst=True)
+    
+    # Databases created after this migration never had the old column
+    product_columns = {col['name'] for col in inspect(conn).get_columns('products')}
+    if 'images' not in product_columns:
+        return
+    
+    already_moved = {row[0] for row in conn.execute(db.select(ProductImage.product_id).distinct())}
+    rows = conn.exec_driver_sql("SELECT id, images FROM products WHERE images IS NOT NULL AND images != ''")
+    new_images = []
+    for product_id, images in rows:
+        if product_id in already_moved:
+            continue
+        paths = [path.strip() for path in images.split(',') if path.strip()]
+        for position, path in enumerate(paths):
+            image = {'product_id': product_id, 'position': position, 'path': path,
+                     'width': None, 'height': None, 'content_hash': None, 'variants': None}
+            file_path = f'static/{path}'
+            if os.path.isfile(file_path):
+                image['content_hash'] = file_digest(file_path)
+                try:
+                    with Image.open(file_path) as img:
+                        image['width'], image['height'] = img.size
+                except OSError:
+                    pass
+            new_images.append(image)
+    
+    if new_images:
+        conn.execute(db.insert(ProductImage), new_images)
+    # The old column is left in place (unmapped) so a rollback loses nothing
+
+
+@migration(5, 'Store products.weight and products.making_charge as DOUBLE')
+def double_product_measures(conn):
+    # MySQL FLOAT is single precision: SQL arithmetic and comparisons saw 2.2999999523
+    # where the app read 2.3, so prices and keyset cursors computed in SQL disagreed
+    if conn.dialect.name not in ('mysql', 'mariadb'):
+        return  # SQLite REAL is already double precision
+    column_types = {col['name']: col['type'] for col in inspect(conn).get_columns('products')}
+    if isinstance(column_types['weight'], Double) and isinstance(column_types['making_charge'], Double):
+        return
+    
+    products = Product.__table__
+    # Read first: the driver returns FLOATs in their shortest decimal form, the values the app has shown
+    rows = conn.execute(select(products.c.id, products.c.weight, products.c.making_charge)).all()
+    conn.exec_driver_sql('ALTER TABLE products MODIFY weight DOUBLE NOT NULL, MODIFY making_charge DOUBLE NOT NULL')
+    if rows:
+        conn.execute(
+            update(products)
+            .where(products.c.id == bindparam('product_id'))
+            .values(weight=bindparam('new_weight'), making_charge=bindparam('new_making_charge'),
+                    updated_at=products.c.updated_at),
+            [{'product_id': row.id, 'new_weight': row.weight, 'new_making_charge': row.making_charge}
+             for row in rows]
+        )
+
+
+def applied_versions(engine):
+    SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(db.select(SchemaMigration.version))}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def upgrade(engine):
+    """Apply every pending migration in order; returns the versions applied"""
+    done = []
+    for version, description, fn in pending_migrations(engine):
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(db.insert(SchemaMigration).values(
+                version=version,
+                description=description,
+                applied_at=datetime.utcnow()
+            ))
+        print(f"✅ Migration {version}: {description}")
+        done.append(version)
+    return done
@@ -0,0 +1,103 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, make_response, request
+
+from version_file import VersionFile
+
+
+class PageCache:
+    """Bounded LRU cache of rendered pages, keyed by data version and URL.
+
+    Admin writes call invalidate(), which bumps a version file shared by
+    all workers on the host; entries rendered under an older version are
+    dropped the next time any worker looks up a page. Entries also expire
+    after a TTL, like RatesCache, for multi-host deployments.
+    """
+
+    def __init__(self, app=None):
+        self.version_file = VersionFile()
+        self.max_entries = 500
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.version_file = VersionFile(app.config.get('PAGE_CACHE_VERSION_FILE'))
+        self.version_file.ensure()
+        self.max_entries = app.config.get('PAGE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('PAGE_CACHE_TTL', self.ttl)
+        app.extensions['page_cache'] = self
+
+    def _key(self):
+        version = self.version_file.read()
+        if version != self._version:
+            with self._lock:
+                self._entries.clear()
+                self._version = version
+        return version, request.endpoint, request.full_path
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every cached page here and in the other workers"""
+        with self._lock:
+            self._entries.clear()
+        self.version_file.bump()
+
+    def data_version(self):
+        """Token that changes on every catalogue or rate write (None if unshared)"""
+        return self.version_file.read()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def cached(self, view):
+        """Decorator: serve a view's successful responses from the cache"""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = self._key()
+            entry = self.get(key)
+            if entry is not None:
+                body, mimetype = entry
+                return current_app.response_class(body, mimetype=mimetype)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                self.set(key, (response.get_data(), response.mimetype))
+            return response
+        return wrapper
+
+
+page_cache = PageCache()
@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+
+from database import db, Product
+
+
+def calculate_price(weight, gold_rate, making_charge, gst_percentage):
+    """Calculate final jewellery price"""
+    metal_price = weight * gold_rate
+    making_cost = weight * making_charge
+    subtotal = metal_price + making_cost
+    gst_amount = (subtotal * gst_percentage) / 100
+    final_price = subtotal + gst_amount
+    return math.ceil(final_price)
+
+
+def calculate_prices(weights, making_charges, gold_rate, gst_percentage):
+    """Price a whole product set in one NumPy pass.
+
+    Applies the same operations in the same order as calculate_price, so
+    each result matches the scalar version exactly. Returns a list of ints.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    making_charges = np.asarray(making_charges, dtype=np.float64)
+    if weights.size == 0:
+        return []
+
+    metal_price = weights * gold_rate
+    making_cost = weights * making_charges
+    subtotal = metal_price + making_cost
+    gst_amount = (subtotal * gst_percentage) / 100
+    final_price = subtotal + gst_amount
+    return np.ceil(final_price).astype(np.int64).tolist()
+
+
+def price_products(products, rates):
+    """Return calculated prices for a list of Product rows at the given rates"""
+    return calculate_prices(
+        [p.weight for p in products],
+        [p.making_charge for p in products],
+        rates.gold_22k,
+        rates.gst
+    )
+
+
+def price_expression(rates):
+    """SQL expression equal to the unrounded calculate_price result"""
+    subtotal = Product.weight * rates.gold_22k + Product.weight * Product.making_charge
+    return subtotal + (subtotal * rates.gst) / 100
+
+
+def materialize_prices(rates, batch_size=1000):
+    """Recompute Product.current_price for every product
+
+    Prices come from calculate_prices, not SQL arithmetic on the stored
+    columns, so the stored price is exactly the one the API and pages
+    show. Products are read and updated batch_size at a time by id.
+    updated_at is left untouched since the product itself did not change.
+    """
+    products = Product.__table__
+    stmt = (
+        update(products)
+        .where(products.c.id == bindparam('product_id'))
+        .values(current_price=bindparam('price'), updated_at=products.c.updated_at)
+    )
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(products.c.id, products.c.weight, products.c.making_charge)
+            .where(products.c.id > last_id)
+            .order_by(products.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        prices = calculate_prices([row.weight for row in rows], [row.making_charge for row in rows],
+                                  rates.gold_22k, rates.gst)
+        db.session.execute(stmt, [{'product_id': row.id, 'price': price} for row, price in zip(rows, prices)])
+        count += len(rows)
+        last_id = rows[-1].id
+    db.session.commit()
+    return count
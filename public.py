@@ -0,0 +1,134 @@
+"""Shop pages, uploaded images, and the health and metrics endpoints."""
+from flask import Blueprint, current_app, render_template, jsonify, url_for, send_from_directory, Response
+from werkzeug.security import safe_join
+import os
+import mimetypes
+from datetime import datetime
+from config import Config
+from database import db, Product, ProductImage
+from rates_cache import rates_cache
+from page_cache import page_cache
+from category_summaries import category_summaries
+from read_replicas import read_replicas
+from search_index import search_index
+from image_jobs import image_jobs
+from metrics import metrics
+from assets import IMMUTABLE_MAX_AGE, file_digest, pending_path
+from pricing import calculate_price
+from sqlalchemy import text
+from sqlalchemy.orm import selectinload
+
+public = Blueprint('public', __name__)
+
+@public.app_template_global()
+def upload_url(image):
+    """URL for a ProductImage or a stored upload path such as uploads/products/<hash>.jpg"""
+    image_path = image.path if isinstance(image, ProductImage) else image.strip()
+    return url_for('public.uploaded_file', filename=image_path[len('uploads/'):])
+
+@public.app_template_global()
+def image_sources(image):
+    """<source> type/srcset pairs for a ProductImage's or upload path's responsive variants"""
+    return [
+        {
+            'type': mime,
+            'srcset': ', '.join(f"{upload_url(path)} {width}w" for path, width in variants)
+        }
+        for mime, variants in image_jobs.sources(image if isinstance(image, ProductImage) else image.strip(), 'static')
+    ]
+
+@public.app_context_processor
+def rates_stream_setting():
+    """Pages only open an EventSource when the server streams rates (see RATES_STREAM_ENABLED)"""
+    return {'rates_stream_enabled': current_app.config['RATES_STREAM_ENABLED']}
+
+@public.route('/')
+@page_cache.cached
+@read_replicas.reads
+def index():
+    """Homepage"""
+    try:
+        gold_rate = rates_cache.get()
+        categories = category_summaries.get(gold_rate)
+        
+        return render_template('index.html',
+                             shop_name=Config.SHOP_NAME,
+                             shop_area=Config.SHOP_AREA,
+                             shop_phone=Config.SHOP_PHONE,
+                             shop_whatsapp=Config.SHOP_WHATSAPP,
+                             gold_rate=gold_rate,
+                             categories=categories)
+    except Exception as e:
+        return f"Error loading homepage: {str(e)}", 500
+
+@public.route('/product/<int:product_id>')
+@page_cache.cached
+@read_replicas.reads
+def product_detail(product_id):
+    """Product detail page"""
+    try:
+        product = Product.query.options(selectinload(Product.images)).get_or_404(product_id)
+        rates = rates_cache.get()
+        
+        # Calculate price
+        price = calculate_price(
+            product.weight,
+            rates.gold_22k,
+            product.making_charge,
+            rates.gst
+        )
+        
+        return render_template('product.html',
+                             product=product,
+                             calculated_price=price,
+                             shop_name=Config.SHOP_NAME,
+                             shop_phone=Config.SHOP_PHONE,
+                             shop_whatsapp=Config.SHOP_WHATSAPP)
+    except Exception as e:
+        return f"Error loading product: {str(e)}", 500
+
+# Serve uploaded files
+@public.route('/uploads/<path:filename>')
+def uploaded_file(filename):
+    """Serve uploads; names are content hashes, so they are cached forever"""
+    path = safe_join('static/uploads', filename)
+    if path and not os.path.exists(path) and os.path.exists(pending_path(path)):
+        # Still being processed: serve the raw upload, but don't let it be cached
+        response = send_from_directory('static/uploads', f'{filename}.pending',
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        response.cache_control.no_store = True
+        return response
+    
+    etag = file_digest(path) if path and os.path.isfile(path) else True
+    response = send_from_directory('static/uploads', filename, etag=etag, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@public.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics for the worker process that answers"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Health check endpoint
+@public.route('/health')
+def health_check():
+    """Health check endpoint"""
+    try:
+        # Test database connection
+        db.session.execute(text('SELECT 1'))
+        return jsonify({
+            'status': 'healthy',
+            'database': 'connected',
+            'timestamp': datetime.now().isoformat(),
+            'page_cache': page_cache.stats(),
+            'category_summaries': category_summaries.stats(),
+            'read_replicas': read_replicas.stats(),
+            'search_index': search_index.stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'unhealthy',
+            'database': 'disconnected',
+            'error': str(e)
+        }), 500
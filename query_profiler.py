@@ -0,0 +1,109 @@
+import re
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from database import db
+
+# A run of bind placeholders, as an expanded IN (...) list renders them
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)')
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """SQL text with literals and IN lists folded, so one query run for different rows compares equal"""
+    shape = _STRING.sub('?', statement)
+    shape = _NUMBER.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?, ...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryProfiler:
+    """Per-request SQL counts, timings and N+1 warnings for development.
+
+    Off unless QUERY_PROFILING is set. When on, every statement run
+    during a request is recorded with its shape (see statement_shape)
+    and duration. Each response gets X-Query-Count, X-Query-Time and a
+    Server-Timing entry (shown by browser dev tools), and one log line.
+    A shape repeated QUERY_PROFILING_REPEAT_THRESHOLD times or more in
+    one request, the usual sign of a lazy relationship loaded row by
+    row, is listed in X-Query-Repeats and logged with its count.
+
+    Streamed responses only include the queries run before the first
+    chunk is sent.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.repeat_threshold = 3
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('QUERY_PROFILING', False)
+        self.repeat_threshold = app.config.get('QUERY_PROFILING_REPEAT_THRESHOLD', 3)
+        app.extensions['query_profiler'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        with app.app_context():
+            for engine in db.engines.values():  # the primary and any read replicas
+                self._watch_engine(engine)
+        print(f"✅ Query profiling on (N+1 warning at {self.repeat_threshold} repeats)")
+
+    def _watch_engine(self, engine):
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('profiler_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info['profiler_started'].pop()
+            if has_request_context() and 'profiled_queries' in g:
+                g.profiled_queries.append((statement, elapsed))
+
+    def _before_request(self):
+        g.profiled_queries = []
+
+    def summary(self, queries):
+        """(count, seconds, [(shape, repeats, seconds)] for shapes over the repeat threshold)"""
+        counts, seconds = Counter(), Counter()
+        for statement, elapsed in queries:
+            shape = statement_shape(statement)
+            counts[shape] += 1
+            seconds[shape] += elapsed
+        repeated = [(shape, count, seconds[shape]) for shape, count in counts.most_common()
+                    if count >= self.repeat_threshold]
+        return len(queries), sum(elapsed for _, elapsed in queries), repeated
+
+    def _after_request(self, response):
+        queries = g.get('profiled_queries')
+        if queries is None:
+            return response
+        count, seconds, repeated = self.summary(queries)
+
+        response.headers['X-Query-Count'] = str(count)
+        response.headers['X-Query-Time'] = f'{seconds * 1000:.2f}ms'
+        response.headers.add('Server-Timing', f'db;dur={seconds * 1000:.2f};desc="{count} queries"')
+        if repeated:
+            # Headers must stay on one line, so long shapes are cut short
+            response.headers['X-Query-Repeats'] = ' | '.join(
+                f'{repeats}x {shape[:120]}' for shape, repeats, _ in repeated[:3])
+
+        path = request.full_path.rstrip('?')
+        marker = '❌' if repeated else '✅'
+        print(f"{marker} {request.method} {path} {response.status_code}: "
+              f"{count} queries in {seconds * 1000:.1f} ms")
+        for shape, repeats, shape_seconds in repeated:
+            print(f"   N+1? {repeats}x ({shape_seconds * 1000:.1f} ms): {shape}")
+        return response
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,238 @@
+"""Gold/silver rate history: OHLC aggregates and the retention job.
+
+Raw GoldRate rows older than RATE_HISTORY_RETENTION_DAYS are rolled up
+into one RateDailySummary per day and deleted. History queries read raw
+rows and summaries together, so charts look the same before and after a
+roll-up, only coarser than a day for the rolled-up range.
+
+    python rate_history.py [--days N]    run the retention job
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, literal, select, union_all
+
+from database import db, GoldRate, GST, RateDailySummary
+from rates_cache import CurrentRates
+
+BUCKETS = ('day', 'week')
+
+
+def bucket_expression(column, bucket, dialect_name):
+    """SQL for the start date of the day/week (weeks start on Monday) containing column"""
+    if bucket == 'day':
+        return func.date(column)
+    if dialect_name == 'sqlite':
+        return func.date(column, '-6 days', 'weekday 1')
+    return func.subdate(func.date(column), func.weekday(column))
+
+
+def ohlc_query(bucket, dialect_name, start=None, end=None, exclude_id=None):
+    """Select one OHLC row per bucket over raw GoldRate rows plus daily summaries
+
+    Rows are (bucket, first_at, last_at, gold open/high/low/close,
+    silver open/high/low/close, samples). Open and close come from the
+    points holding the bucket's first and last timestamps.
+    """
+    raw = select(
+        bucket_expression(GoldRate.updated_at, bucket, dialect_name).label('bucket'),
+        GoldRate.updated_at.label('first_at'),
+        GoldRate.updated_at.label('last_at'),
+        GoldRate.gold_22k.label('gold_open'),
+        GoldRate.gold_22k.label('gold_high'),
+        GoldRate.gold_22k.label('gold_low'),
+        GoldRate.gold_22k.label('gold_close'),
+        GoldRate.silver.label('silver_open'),
+        GoldRate.silver.label('silver_high'),
+        GoldRate.silver.label('silver_low'),
+        GoldRate.silver.label('silver_close'),
+        literal(1).label('samples')
+    )
+    summaries = select(
+        bucket_expression(RateDailySummary.opened_at, bucket, dialect_name).label('bucket'),
+        RateDailySummary.opened_at.label('first_at'),
+        RateDailySummary.closed_at.label('last_at'),
+        RateDailySummary.gold_open,
+        RateDailySummary.gold_high,
+        RateDailySummary.gold_low,
+        RateDailySummary.gold_close,
+        RateDailySummary.silver_open,
+        RateDailySummary.silver_high,
+        RateDailySummary.silver_low,
+        RateDailySummary.silver_close,
+        RateDailySummary.samples
+    )
+    if start is not None:
+        raw = raw.where(GoldRate.updated_at >= start)
+        summaries = summaries.where(RateDailySummary.closed_at >= start)
+    if end is not None:
+        raw = raw.where(GoldRate.updated_at < end)
+        summaries = summaries.where(RateDailySummary.opened_at < end)
+    if exclude_id is not None:
+        raw = raw.where(GoldRate.id != exclude_id)
+
+    points = union_all(raw, summaries).cte('points')
+    buckets = select(
+        points.c.bucket,
+        func.min(points.c.first_at).label('first_at'),
+        func.max(points.c.last_at).label('last_at'),
+        func.max(points.c.gold_high).label('gold_high'),
+        func.min(points.c.gold_low).label('gold_low'),
+        func.max(points.c.silver_high).label('silver_high'),
+        func.min(points.c.silver_low).label('silver_low'),
+        func.sum(points.c.samples).label('samples')
+    ).group_by(points.c.bucket).cte('buckets')
+
+    first = points.alias('first_point')
+    last = points.alias('last_point')
+    return (
+        select(
+            buckets.c.bucket,
+            buckets.c.first_at,
+            buckets.c.last_at,
+            first.c.gold_open,
+            buckets.c.gold_high,
+            buckets.c.gold_low,
+            last.c.gold_close,
+            first.c.silver_open,
+            buckets.c.silver_high,
+            buckets.c.silver_low,
+            last.c.silver_close,
+            buckets.c.samples
+        )
+        .join(first, (first.c.bucket == buckets.c.bucket) & (first.c.first_at == buckets.c.first_at))
+        .join(last, (last.c.bucket == buckets.c.bucket) & (last.c.last_at == buckets.c.last_at))
+        .order_by(buckets.c.bucket)
+    )
+
+
+def _rows_by_bucket(rows):
+    # Two points sharing a first/last timestamp would repeat a bucket; keep one
+    by_bucket = {}
+    for row in rows:
+        by_bucket.setdefault(str(row.bucket), row)
+    return by_bucket
+
+
+def rate_history(start, end, bucket='day'):
+    """OHLC gold/silver rates per day or week between start and end"""
+    stmt = ohlc_query(bucket, db.engine.dialect.name, start, end)
+    history = []
+    for bucket_start, row in _rows_by_bucket(db.session.execute(stmt)).items():
+        history.append({
+            'bucket': bucket_start,
+            'gold': {'open': row.gold_open, 'high': row.gold_high, 'low': row.gold_low, 'close': row.gold_close},
+            'silver': {'open': row.silver_open, 'high': row.silver_high, 'low': row.silver_low, 'close': row.silver_close},
+            'samples': row.samples
+        })
+    return history
+
+
+def rates_as_of(moment):
+    """The GoldRate and GST in effect at a moment, as CurrentRates (None if none yet)
+
+    Each lookup is a single indexed "latest row with updated_at <= moment"
+    query. For days already rolled up the summary stands in: its close
+    after the day ended, its open during the day since intraday changes
+    are no longer known.
+    """
+    gold_rate = (GoldRate.query.filter(GoldRate.updated_at <= moment)
+                 .order_by(GoldRate.updated_at.desc()).first())
+    summary = (RateDailySummary.query.filter(RateDailySummary.opened_at <= moment)
+               .order_by(RateDailySummary.opened_at.desc()).first())
+    gst = GST.query.filter(GST.updated_at <= moment).order_by(GST.updated_at.desc()).first()
+    if gst is None:
+        return None
+
+    if summary and (gold_rate is None or summary.closed_at > gold_rate.updated_at):
+        if summary.closed_at <= moment:
+            gold_22k, silver, updated_at = summary.gold_close, summary.silver_close, summary.closed_at
+        else:
+            gold_22k, silver, updated_at = summary.gold_open, summary.silver_open, summary.opened_at
+    elif gold_rate:
+        gold_22k, silver, updated_at = gold_rate.gold_22k, gold_rate.silver, gold_rate.updated_at
+    else:
+        return None
+
+    return CurrentRates(
+        gold_22k=gold_22k,
+        silver=silver,
+        updated_at=updated_at,
+        gst=gst.percentage,
+        gst_updated_at=gst.updated_at
+    )
+
+
+def roll_up(retention_days):
+    """Roll GoldRate rows older than retention_days into daily summaries
+
+    The latest GoldRate row is always kept raw since it is the current
+    rate. GST changes are rare, so old GST rows are simply thinned to the
+    last one of each day. Returns the number of raw rows removed.
+    """
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    cutoff = today - timedelta(days=retention_days)
+    latest = GoldRate.query.order_by(GoldRate.updated_at.desc()).first()
+    latest_id = latest.id if latest else None
+
+    stmt = ohlc_query('day', db.engine.dialect.name, end=cutoff, exclude_id=latest_id)
+    days = _rows_by_bucket(db.session.execute(stmt))
+
+    for row in days.values():
+        day = row.first_at.date() if isinstance(row.first_at, datetime) else \
+            datetime.fromisoformat(str(row.first_at)).date()
+        db.session.execute(delete(RateDailySummary).where(RateDailySummary.day == day))
+        db.session.add(RateDailySummary(
+            day=day,
+            opened_at=row.first_at,
+            closed_at=row.last_at,
+            gold_open=row.gold_open,
+            gold_high=row.gold_high,
+            gold_low=row.gold_low,
+            gold_close=row.gold_close,
+            silver_open=row.silver_open,
+            silver_high=row.silver_high,
+            silver_low=row.silver_low,
+            silver_close=row.silver_close,
+            samples=row.samples
+        ))
+
+    removed = db.session.execute(
+        delete(GoldRate)
+        .where(GoldRate.updated_at < cutoff, GoldRate.id != latest_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    # Keep the last GST row of each old day, and always the current one
+    keep = select(func.max(GST.id)).where(GST.updated_at < cutoff).group_by(func.date(GST.updated_at))
+    keep_ids = {row[0] for row in db.session.execute(keep)}
+    latest_gst = GST.query.order_by(GST.updated_at.desc()).first()
+    if latest_gst:
+        keep_ids.add(latest_gst.id)
+    removed += db.session.execute(
+        delete(GST)
+        .where(GST.updated_at < cutoff, GST.id.notin_(keep_ids))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    db.session.commit()
+    return removed
+
+
+def main():
+    from config import Config
+    from migrate import create_migration_app
+
+    parser = argparse.ArgumentParser(description='Roll old gold rate rows up into daily summaries')
+    parser.add_argument('--days', type=int, default=Config.RATE_HISTORY_RETENTION_DAYS,
+                        help='keep raw rows for this many days (default: %(default)s)')
+    args = parser.parse_args()
+
+    app = create_migration_app()
+    with app.app_context():
+        removed = roll_up(args.days)
+        print(f"✅ Rolled up rate history older than {args.days} days ({removed} rows removed)")
+
+
+if __name__ == '__main__':
+    main()
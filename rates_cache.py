@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from database import db, GoldRate, GST
+from version_file import VersionFile
+
+# Snapshot of the latest GoldRate and GST rows. Attribute names match the
+# GoldRate model so templates can use it in place of a GoldRate instance.
+CurrentRates = namedtuple('CurrentRates', ['gold_22k', 'silver', 'updated_at', 'gst', 'gst_updated_at'])
+
+
+class RatesCache:
+    """In-process cache of the current gold/silver rate and GST.
+
+    Every worker keeps its own copy. Writers call invalidate() after
+    committing a new rate; that also rewrites a small version file so
+    other Gunicorn workers on the same host notice the change with a
+    single stat/read instead of two MySQL queries. The TTL is a safety
+    net for deployments spread over several hosts.
+    """
+
+    def __init__(self, app=None):
+        self.version_file = VersionFile()
+        self.ttl = 300
+        self._rates = None
+        self._version = None
+        self._loaded_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.version_file = VersionFile(app.config.get('RATES_VERSION_FILE'))
+        self.ttl = app.config.get('RATES_CACHE_TTL', self.ttl)
+        app.extensions['rates_cache'] = self
+
+    def _load(self):
+        """Read the latest rates from the database, seeding defaults if empty"""
+        config = current_app.config
+
+        gold_rate = GoldRate.query.order_by(GoldRate.updated_at.desc()).first()
+        gst = GST.query.order_by(GST.updated_at.desc()).first()
+
+        if not gold_rate:
+            gold_rate = GoldRate(gold_22k=config['DEFAULT_GOLD_RATE'], silver=config['DEFAULT_SILVER_RATE'])
+            db.session.add(gold_rate)
+            db.session.commit()
+
+        if not gst:
+            gst = GST(percentage=config['DEFAULT_GST'])
+            db.session.add(gst)
+            db.session.commit()
+
+        return CurrentRates(
+            gold_22k=gold_rate.gold_22k,
+            silver=gold_rate.silver,
+            updated_at=gold_rate.updated_at,
+            gst=gst.percentage,
+            gst_updated_at=gst.updated_at
+        )
+
+    def peek(self):
+        """Return the current rates if cached and fresh, else None; never queries the database"""
+        version = self.version_file.read()
+        rates = self._rates
+        if (rates is not None and version == self._version
+                and time.monotonic() - self._loaded_at < self.ttl):
+            self.hits += 1
+            return rates
+        return None
+
+    def get(self):
+        """Return the current rates, reloading only when stale"""
+        rates = self.peek()
+        if rates is not None:
+            return rates
+
+        version = self.version_file.read()
+        with self._lock:
+            if (self._rates is not None and version == self._version
+                    and time.monotonic() - self._loaded_at < self.ttl):
+                self.hits += 1
+                return self._rates
+            self.misses += 1
+            self._rates = self._load()
+            self._version = version
+            self._loaded_at = time.monotonic()
+            return self._rates
+
+    def invalidate(self):
+        """Drop the cached rates here and signal the other workers"""
+        with self._lock:
+            self._rates = None
+        self.version_file.bump()
+        with self._changed:
+            self._changed.notify_all()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def wait_for_change(self, timeout):
+        """Block until invalidate() runs in this process or timeout passes
+
+        Changes made by other workers are only seen by the next get(), so
+        callers should poll with a short timeout.
+        """
+        with self._changed:
+            self._changed.wait(timeout)
+
+
+rates_cache = RatesCache()
@@ -0,0 +1,162 @@
+import functools
+import random
+import threading
+import time
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+
+from version_file import VersionFile
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the replica a view was given (see ReadReplicas.reads).
+
+    Flushes, INSERT/UPDATE/DELETE and text statements always go to the
+    primary. After the first write the session stays on the primary, so
+    a view reads back what it just wrote.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if replica is not None and bind is None:
+            if not self._flushing and getattr(clause, 'is_select', False):
+                return replica
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info.pop('replica')
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+
+class ReadReplicas:
+    """Route the read-only public views to replica databases.
+
+    Replicas are the SQLALCHEMY_BINDS named replica_<n> (set from
+    DATABASE_REPLICA_URIS). A view decorated with reads() runs its
+    SELECTs on a random healthy replica; every other view, the admin
+    pages included, uses the primary only.
+
+    A request falls back to the primary when no replica is healthy: a
+    replica is skipped when it is unreachable, has replication stopped,
+    or reports more than REPLICA_MAX_LAG seconds of lag. Each worker
+    checks this every REPLICA_CHECK_INTERVAL seconds. The primary is also
+    used for REPLICA_MAX_LAG seconds after any write on this host, so a
+    page rendered (and cached) right after an admin change never shows
+    the data from before it.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.write_version = VersionFile()
+        self.max_lag = 5
+        self.check_interval = 5
+        self.keys = []
+        self._checks = {}  # bind key -> (monotonic time checked, lag in seconds or None if unusable)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.write_version = VersionFile(app.config.get('REPLICA_WRITE_VERSION_FILE'))
+        self.max_lag = app.config.get('REPLICA_MAX_LAG', self.max_lag)
+        self.check_interval = app.config.get('REPLICA_CHECK_INTERVAL', self.check_interval)
+        app.extensions['read_replicas'] = self
+        with app.app_context():
+            engines = app.extensions['sqlalchemy'].engines
+            self.keys = sorted(key for key in engines if key and key.startswith(REPLICA_BIND_PREFIX))
+            if self.keys:
+                self._watch_writes(engines[None])
+
+    def _watch_writes(self, engine):
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            if context is not None and (context.isinsert or context.isupdate or context.isdelete):
+                conn.info['replica_wrote'] = True
+
+        @event.listens_for(engine, 'commit')
+        def committed(conn):
+            if conn.info.pop('replica_wrote', False):
+                self.write_version.bump()
+
+        @event.listens_for(engine, 'rollback')
+        def rolled_back(conn):
+            conn.info.pop('replica_wrote', None)
+
+    def _lag(self, engine):
+        """Replication lag in seconds (0 if the database is not replicating), or None if stopped"""
+        with engine.connect() as conn:
+            if engine.dialect.name not in ('mysql', 'mariadb'):
+                conn.execute(text('SELECT 1'))
+                return 0
+            # MySQL 8.4 only knows the first, MariaDB before 10.5 only the second
+            for statement in ('SHOW REPLICA STATUS', 'SHOW SLAVE STATUS'):
+                try:
+                    row = conn.execute(text(statement)).mappings().first()
+                    break
+                except DBAPIError:
+                    conn.rollback()
+            else:
+                return None
+            if row is None:
+                return 0
+            return row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+
+    def _usable(self, key, engine):
+        checked = self._checks.get(key)
+        if checked is None or time.monotonic() - checked[0] >= self.check_interval:
+            # One check at a time; other requests go by the last result meanwhile
+            if self._lock.acquire(blocking=False):
+                try:
+                    try:
+                        lag = self._lag(engine)
+                    except Exception as e:
+                        print(f"❌ Read replica {key} unavailable: {e}")
+                        lag = None
+                    if lag is not None and lag > self.max_lag:
+                        print(f"❌ Read replica {key} is {lag}s behind, using the primary")
+                    self._checks[key] = checked = (time.monotonic(), lag)
+                finally:
+                    self._lock.release()
+            else:
+                checked = self._checks.get(key)
+        return checked is not None and checked[1] is not None and checked[1] <= self.max_lag
+
+    def choose(self):
+        """A replica engine for this request's reads, or None to use the primary"""
+        if not self.keys:
+            return None
+        age = self.write_version.age()
+        if age is not None and age < self.max_lag:
+            return None  # replicas may not have the latest write yet
+        engines = current_app.extensions['sqlalchemy'].engines
+        usable = [key for key in self.keys if self._usable(key, engines[key])]
+        return engines[random.choice(usable)] if usable else None
+
+    def reads(self, view):
+        """Decorator: run a read-only view's SELECTs on a replica when one is fit to serve them"""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            replica = self.choose()
+            if replica is None:
+                return view(*args, **kwargs)
+            session = current_app.extensions['sqlalchemy'].session
+            session.info['replica'] = replica
+            try:
+                return view(*args, **kwargs)
+            finally:
+                session.info.pop('replica', None)
+        return wrapper
+
+    def stats(self):
+        usable = [key for key, (_, lag) in self._checks.items() if lag is not None and lag <= self.max_lag]
+        return {
+            'replicas': len(self.keys),
+            'usable': len(usable)
+        }
+
+
+read_replicas = ReadReplicas()
@@ -0,0 +1,287 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+
+from flask import current_app
+from sqlalchemy.orm import load_only, selectinload
+
+from database import Category, Product
+from version_file import VersionFile
+
+# A hit in a name counts for more than one in the description
+FIELD_WEIGHTS = {
+    'name': 4,
+    'name_bn': 4,
+    'category': 3,
+    'purity': 2,
+    'description_bn': 1
+}
+
+# Prefix hits score less than whole-word hits
+PREFIX_FACTOR = 0.5
+
+# Shorter query words only match whole words; a one-letter prefix would
+# touch most of the catalogue
+MIN_PREFIX_LENGTH = 2
+
+# Expanded prefixes kept until the index next changes; customers typing
+# "ne", "nec", "neck"... repeat the same expansions
+PREFIX_CACHE_SIZE = 1000
+
+# Bengali spellings that customers use interchangeably. Text is NFD
+# normalized first, so ড়/ঢ়/য় arrive as letter + nukta and two-part vowel
+# signs (ো, ৌ) as their components.
+_FOLD = str.maketrans({
+    '\u09bc': None,  # nukta
+    '\u0981': None,  # chandrabindu
+    '\u200c': None,  # zero width non-joiner
+    '\u200d': None,  # zero width joiner
+    '\u09c0': '\u09bf',  # ী -> ি
+    '\u09c2': '\u09c1',  # ূ -> ু
+    '\u0988': '\u0987',  # ঈ -> ই
+    '\u098a': '\u0989',  # ঊ -> উ
+    '\u09ce': '\u09a4',  # ৎ -> ত
+    **{chr(0x09e6 + digit): str(digit) for digit in range(10)}  # ০-৯ -> 0-9
+})
+
+# Vowel signs and virama are combining marks, which \w does not match
+_TOKEN = re.compile(r'[0-9a-z\u0980-\u09ff]+')
+
+
+def normalize(text):
+    """Fold case, Unicode form and Bengali spelling variants"""
+    return unicodedata.normalize('NFD', text).lower().translate(_FOLD)
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize(text)) if text else []
+
+
+def _document(product):
+    """The fields a search result returns, kept in memory with the index"""
+    return {
+        'id': product.id,
+        'name': product.name,
+        'name_bn': product.name_bn,
+        'category_id': product.category_id,
+        'purity': product.purity,
+        'weight': product.weight,
+        'making_charge': product.making_charge,
+        'stock_status': product.stock_status,
+        'primary_image': product.primary_image.path if product.primary_image else None
+    }
+
+
+class SearchIndex:
+    """In-memory inverted index over the product catalogue.
+
+    Maps each normalized word of a product's names, description, purity
+    and category names to the products containing it. Words are also
+    kept sorted so a query word can match every word it prefixes.
+    Searches never touch the database.
+
+    Every worker holds its own index. Product writes update it in place
+    and bump a version file; other workers rebuild from the database in
+    the background when they see a new version, serving the old index
+    meanwhile. Category changes and bulk imports only mark the index
+    dirty, so the next search starts one background rebuild however many
+    of them came first. The TTL forces a periodic rebuild for multi-host
+    setups.
+    """
+
+    def __init__(self, app=None):
+        self.version_file = VersionFile()
+        self.ttl = 3600
+        self._postings = {}
+        self._terms = []
+        self._documents = {}
+        self._product_terms = {}
+        self._category_terms = {}
+        self._prefix_cache = {}
+        self._version = None
+        self._built_at = None
+        self._dirty = False
+        self._rebuilding = False
+        self._lock = threading.RLock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.version_file = VersionFile(app.config.get('SEARCH_INDEX_VERSION_FILE'))
+        self.version_file.ensure()
+        self.ttl = app.config.get('SEARCH_INDEX_TTL', self.ttl)
+        app.extensions['search_index'] = self
+
+    def _product_weights(self, document, description_bn):
+        weights = {}
+        fields = [
+            ('name', document['name']),
+            ('name_bn', document['name_bn']),
+            ('purity', document['purity']),
+            ('description_bn', description_bn)
+        ]
+        for field, text in fields:
+            for term in tokenize(text):
+                weights[term] = max(weights.get(term, 0), FIELD_WEIGHTS[field])
+        for term in self._category_terms.get(document['category_id'], ()):
+            weights[term] = max(weights.get(term, 0), FIELD_WEIGHTS['category'])
+        return weights
+
+    def _add(self, product):
+        self._remove(product.id)
+        self._prefix_cache = {}
+        document = _document(product)
+        weights = self._product_weights(document, product.description_bn)
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[product.id] = weight
+        self._documents[product.id] = document
+        self._product_terms[product.id] = list(weights)
+
+    def _remove(self, product_id):
+        self._prefix_cache = {}
+        self._documents.pop(product_id, None)
+        for term in self._product_terms.pop(product_id, ()):
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def rebuild(self):
+        """Index the whole catalogue from the database; returns the product count"""
+        version = self.version_file.read()
+        self._dirty = False  # before reading, so a change made during the rebuild marks it again
+        fresh = SearchIndex()
+        fresh._category_terms = {
+            category.id: tokenize(category.name) + tokenize(category.name_bn)
+            for category in Category.query.all()
+        }
+        products = (Product.query
+                    .options(load_only(Product.id, Product.name, Product.name_bn, Product.description_bn,
+                                       Product.category_id, Product.purity, Product.weight,
+                                       Product.making_charge, Product.stock_status),
+                             selectinload(Product.primary_image))
+                    .all())
+        for product in products:
+            fresh._add(product)
+
+        with self._lock:
+            self._postings = fresh._postings
+            self._terms = fresh._terms
+            self._documents = fresh._documents
+            self._product_terms = fresh._product_terms
+            self._category_terms = fresh._category_terms
+            self._prefix_cache = {}
+            self._version = version
+            self._built_at = time.monotonic()
+        return len(products)
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                self.rebuild()
+        except Exception as e:
+            print(f"❌ Search index rebuild error: {e}")
+        finally:
+            self._rebuilding = False
+
+    def _is_stale(self):
+        return (self._dirty
+                or self._version != self.version_file.read()
+                or time.monotonic() - self._built_at >= self.ttl)
+
+    def _ensure_fresh(self):
+        if self._built_at is None:
+            self.rebuild()
+        elif self._is_stale() and not self._rebuilding:
+            self._rebuilding = True
+            app = current_app._get_current_object()
+            threading.Thread(target=self._rebuild_in_background, args=(app,), daemon=True).start()
+
+    def _changed(self, apply):
+        """Apply a local change and tell the other workers about it"""
+        with self._lock:
+            if self._built_at is None or self._is_stale():
+                # The next search rebuilds from the database, which includes this change too
+                self._dirty = True
+                self.version_file.bump()
+            else:
+                apply()
+                self._version = self.version_file.bump()
+
+    def add_product(self, product):
+        """(Re)index a product after an add or edit has been committed"""
+        self._changed(lambda: self._add(product))
+
+    def remove_product(self, product_id):
+        """Drop a product after its delete has been committed"""
+        self._changed(lambda: self._remove(product_id))
+
+    def invalidate(self):
+        """Mark the index for a rebuild on the next search (category changes, bulk imports)"""
+        self._dirty = True
+        self.version_file.bump()
+
+    def _matches(self, term):
+        """product id -> score for one query word, including words it prefixes"""
+        exact = self._postings.get(term, {})
+        if len(term) < MIN_PREFIX_LENGTH:
+            return exact
+
+        start = bisect.bisect_left(self._terms, term)
+        end = bisect.bisect_left(self._terms, term + '\uffff')
+        longer = [prefixed for prefixed in self._terms[start:end] if prefixed != term]
+        if not longer:
+            return exact
+
+        scores = self._prefix_cache.get(term)
+        if scores is None:
+            scores = dict(exact)
+            for prefixed in longer:
+                for product_id, weight in self._postings[prefixed].items():
+                    score = weight * PREFIX_FACTOR
+                    if score > scores.get(product_id, 0):
+                        scores[product_id] = score
+            if len(self._prefix_cache) >= PREFIX_CACHE_SIZE:
+                self._prefix_cache = {}
+            self._prefix_cache[term] = scores
+        return scores
+
+    def search(self, query, limit=20):
+        """Products matching every word of query, best first
+
+        Returns (total matches, [(document, score)]).
+        """
+        self._ensure_fresh()
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return 0, []
+
+        with self._lock:
+            # Intersect the rarest words first so the candidate set shrinks fastest
+            matches = sorted((self._matches(term) for term in terms), key=len)
+            scores = matches[0]
+            for other in matches[1:]:
+                scores = {product_id: scores[product_id] + other[product_id]
+                          for product_id in scores.keys() & other.keys()}
+
+            # Equal scores are listed by id; which of them make the cut at the limit is arbitrary
+            best = heapq.nlargest(limit, scores, key=scores.__getitem__)
+            best.sort(key=lambda product_id: (-scores[product_id], product_id))
+            return len(scores), [(self._documents[product_id], scores[product_id]) for product_id in best]
+
+    def stats(self):
+        return {
+            'products': len(self._documents),
+            'terms': len(self._terms)
+        }
+
+
+search_index = SearchIndex()
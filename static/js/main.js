@@ -1,9 +1,9 @@
 // Main JavaScript for Jewellery Shop
 
 document.addEventListener('DOMContentLoaded', function() {
-    // Auto-update gold rates every hour
+    // Live gold rates: pushed by the server, or polled hourly as a fallback
     updateGoldRates();
-    setInterval(updateGoldRates, 3600000); // Update every hour
+    watchGoldRates();
     
     // Handle image zoom for mobile
     setupImageZoom();
@@ -14,30 +14,65 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// ETag of the last rates response; the server answers 304 while it still matches
+let ratesETag = null;
+
+function watchGoldRates() {
+    const startPolling = () => setInterval(updateGoldRates, 3600000); // Update every hour
+    
+    // Without the server-side stream an EventSource would only get a 204
+    if (!window.EventSource || document.body.dataset.ratesStream !== 'on') {
+        startPolling();
+        return;
+    }
+    
+    const source = new EventSource('/api/rates/stream');
+    source.addEventListener('rates', event => showGoldRates(JSON.parse(event.data)));
+    source.onerror = function() {
+        // CLOSED means the stream is disabled or unavailable; otherwise the browser retries
+        if (source.readyState === EventSource.CLOSED) {
+            startPolling();
+        }
+    };
+}
+
 function updateGoldRates() {
-    fetch('/api/rates')
-        .then(response => response.json())
-        .then(data => {
-            // Update rates on homepage if elements exist
-            const goldRateElement = document.querySelector('.rate-item:first-child .price');
-            const silverRateElement = document.querySelector('.rate-item:nth-child(2) .price');
-            const timeElement = document.querySelector('.rate-item:last-child .time');
-            
-            if (goldRateElement) {
-                goldRateElement.textContent = `₹${data.gold_22k.toFixed(2)} / গ্রাম`;
+    const headers = ratesETag ? { 'If-None-Match': ratesETag } : {};
+    fetch('/api/rates', { headers: headers, cache: 'no-store' })
+        .then(response => {
+            if (response.status === 304) {
+                return null; // Rates unchanged
             }
-            
-            if (silverRateElement) {
-                silverRateElement.textContent = `₹${data.silver.toFixed(2)} / গ্রাম`;
-            }
-            
-            if (timeElement) {
-                timeElement.textContent = data.updated_at;
+            ratesETag = response.headers.get('ETag');
+            return response.json();
+        })
+        .then(data => {
+            if (data) {
+                showGoldRates(data);
             }
         })
         .catch(error => console.error('Error fetching rates:', error));
 }
 
+function showGoldRates(data) {
+    // Update rates on homepage if elements exist
+    const goldRateElement = document.querySelector('.rate-item:first-child .price');
+    const silverRateElement = document.querySelector('.rate-item:nth-child(2) .price');
+    const timeElement = document.querySelector('.rate-item:last-child .time');
+    
+    if (goldRateElement) {
+        goldRateElement.textContent = `₹${data.gold_22k.toFixed(2)} / গ্রাম`;
+    }
+    
+    if (silverRateElement) {
+        silverRateElement.textContent = `₹${data.silver.toFixed(2)} / গ্রাম`;
+    }
+    
+    if (timeElement) {
+        timeElement.textContent = data.updated_at;
+    }
+}
+
 function setupImageZoom() {
     const images = document.querySelectorAll('.product-image img');
     images.forEach(img => {
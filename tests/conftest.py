@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Config reads the environment at import time, so point it at an in-memory
+# database and private version files before the app is imported
+_tmp = tempfile.mkdtemp(prefix='jewellery-tests-')
+os.environ['DATABASE_URI'] = 'sqlite://'
+for name in ('RATES_VERSION_FILE', 'PAGE_CACHE_VERSION_FILE', 'SEARCH_INDEX_VERSION_FILE', 'REPLICA_WRITE_VERSION_FILE'):
+    os.environ[name] = os.path.join(_tmp, name.lower())
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app():
+    from app import app
+    import commands
+    from database import db
+
+    with app.app_context():
+        commands.init_db()
+        commands.seed_defaults()
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
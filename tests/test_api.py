@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from database import db, Category, Product
+
+
+@pytest.fixture
+def catalogue(app):
+    rng = random.Random(7)
+    category = Category.query.first()
+    # Few distinct weights and charges, so many products tie on the sort value
+    db.session.add_all([
+        Product(name=f'P{i}', name_bn=f'P{i}', category_id=category.id, purity='22K',
+                weight=rng.choice([0.3, 2.3, 4.7, 12.345]), making_charge=rng.choice([350.5, 410.1, 499.99]))
+        for i in range(120)
+    ])
+    db.session.commit()
+    return app
+
+
+def all_pages(client, query):
+    ids, cursor = [], None
+    while True:
+        response = client.get(f'/api/products?{query}&limit=7' + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        body = response.get_json()
+        ids.extend(product['id'] for product in body['products'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize('sort', ['category', 'weight', 'price', 'newest'])
+def test_keyset_pages_return_every_product_once(catalogue, sort):
+    client = catalogue.test_client()
+    ids = all_pages(client, f'sort={sort}')
+    assert len(ids) == len(set(ids)) == 120
+
+    products = {p['id']: p for p in client.get('/api/products?limit=200').get_json()['products']}
+    if sort == 'weight':
+        assert [products[i]['weight'] for i in ids] == sorted(p['weight'] for p in products.values())
+    if sort == 'price':
+        prices = [products[i]['calculated_price'] for i in ids]
+        assert prices == sorted(prices)
+
+
+def test_price_filter_matches_calculated_prices(catalogue):
+    client = catalogue.test_client()
+    products = client.get('/api/products?limit=200').get_json()['products']
+    low = sorted(p['calculated_price'] for p in products)[30]
+    high = sorted(p['calculated_price'] for p in products)[90]
+    ids = set(all_pages(client, f'sort=price&min_price={low}&max_price={high}'))
+    assert ids == {p['id'] for p in products if low <= p['calculated_price'] <= high}
+
+
+def test_prices_as_of_rejects_bodies_that_are_not_json_objects(app):
+    client = app.test_client()
+    for kwargs in ({'data': 'product_id=1'}, {'data': '{broken', 'content_type': 'application/json'}, {'json': [1, 2]}):
+        response = client.post('/api/prices/as-of', **kwargs)
+        assert response.status_code == 400
+        assert 'JSON object' in response.get_json()['error']
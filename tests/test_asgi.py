@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from asgi import AsyncAPI
+
+
+@pytest.fixture
+def streaming_app(app):
+    settings = {key: app.config[key] for key in ('RATES_STREAM_ENABLED', 'RATES_STREAM_POLL', 'RATES_STREAM_MAX_AGE')}
+    app.config.update(RATES_STREAM_ENABLED=True, RATES_STREAM_POLL=0.01, RATES_STREAM_MAX_AGE=0.05)
+    yield app
+    app.config.update(settings)
+
+
+def call(asgi_app, path, headers=()):
+    messages = []
+
+    async def receive():
+        await asyncio.sleep(60)  # the client never disconnects
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'',
+             'headers': [(name.encode(), value.encode()) for name, value in headers]}
+    asyncio.run(asgi_app(scope, receive, send))
+    return messages
+
+
+def test_rates_stream_runs_on_the_event_loop(streaming_app):
+    messages = call(AsyncAPI(streaming_app), '/api/rates/stream')
+    assert messages[0]['status'] == 200
+    assert (b'content-type', b'text/event-stream; charset=utf-8') in messages[0]['headers']
+    body = b''.join(message.get('body', b'') for message in messages[1:]).decode()
+    assert body.startswith('retry: 10\n\n')
+    assert body.count('event: rates') == 1  # sent once, then only when the rates change
+    assert messages[-1] == {'type': 'http.response.body', 'body': b''}
+
+
+def test_pages_poll_when_the_stream_is_off(app):
+    body = app.test_client().get('/').get_data(as_text=True)
+    assert 'new EventSource' not in body
+    assert 'pollRates();' in body
+
+
+def test_flask_rates_stream_sends_an_integer_retry(streaming_app):
+    body = streaming_app.test_client().get('/api/rates/stream').get_data(as_text=True)
+    assert body.startswith('retry: 10\n\n')
@@ -0,0 +1,20 @@
+from flask import url_for
+
+
+def test_only_the_current_static_version_is_immutable(app):
+    client = app.test_client()
+    with app.test_request_context():
+        url = url_for('static', filename='css/style.css')
+    assert '?v=' in url
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 31536000
+    response.close()
+
+    response = client.get('/static/css/style.css?v=x')
+    assert response.status_code == 200
+    assert not response.cache_control.immutable
+    assert response.cache_control.no_cache
+    response.close()
@@ -0,0 +1,29 @@
+import bulk_import
+from database import db, Category, Product
+
+
+def product_row(i, category):
+    return {'name': f'Ring {i}', 'name_bn': f'আংটি {i}', 'category': str(category.id), 'purity': '22K',
+            'weight': str(2 + i / 10), 'making_charge': '450'}
+
+
+def test_chunks_are_inserted_with_their_ids(app):
+    category = Category.query.first()
+    db.session.add(Product(name='Existing', name_bn='Existing', category_id=category.id, purity='22K',
+                           weight=1.0, making_charge=100.0))
+    db.session.commit()
+
+    mappings = [{'name': f'Ring {i}', 'name_bn': f'আংটি {i}', 'category_id': category.id, 'purity': '22K',
+                 'weight': 2.0 + i, 'making_charge': 450.0} for i in range(5)]
+    bulk_import._insert_products(mappings)
+    db.session.commit()
+    assert [db.session.get(Product, mapping['id']).name for mapping in mappings] == [f'Ring {i}' for i in range(5)]
+
+
+def test_import_products_inserts_every_chunk(app):
+    category = Category.query.first()
+    rows = [(number, product_row(number, category)) for number in range(2, 9)]
+    report, futures = bulk_import.import_products(rows, batch_size=3)
+    assert report == {'imported': 7, 'failed': 0, 'images_queued': 0, 'errors': []}
+    assert futures == []
+    assert sorted(p.name for p in Product.query) == sorted(f'Ring {number}' for number in range(2, 9))
@@ -0,0 +1,26 @@
+import json
+
+import catalogue_export
+from database import db, Category, Product, ProductImage
+from pricing import calculate_price
+from rates_cache import rates_cache
+
+
+def test_export_pages_through_every_product(app):
+    category = Category.query.first()
+    db.session.add_all([
+        Product(name=f'P{i}', name_bn=f'P{i}', category_id=category.id, purity='22K',
+                weight=1.5 + i, making_charge=400.0,
+                images=[ProductImage(position=0, path=f'uploads/products/p{i}.jpg')])
+        for i in range(25)
+    ])
+    db.session.commit()
+    db.session.expire_all()
+
+    rates = rates_cache.get()
+    lines = ''.join(catalogue_export.stream('ndjson', rates, chunk_size=10)).splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [row['name'] for row in rows] == [f'P{i}' for i in range(25)]
+    for i, row in enumerate(rows):
+        assert row['images'] == [f'uploads/products/p{i}.jpg']
+        assert row['calculated_price'] == calculate_price(1.5 + i, rates.gold_22k, 400.0, rates.gst)
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+from flask import render_template
+
+from category_summaries import CategorySummaries
+from database import db, Category, Product
+from pricing import calculate_price, materialize_prices
+from rates_cache import rates_cache
+
+
+@pytest.mark.parametrize('materialized', [False, True])
+def test_price_range_matches_calculate_price(app, materialized):
+    rng = random.Random(25)
+    categories = Category.query.order_by(Category.id).all()
+    db.session.add_all([
+        Product(name=f'P{i}', name_bn=f'P{i}', category_id=rng.choice(categories).id, purity='22K',
+                weight=round(rng.uniform(0.5, 80), 3), making_charge=round(rng.uniform(100, 2500), 2))
+        for i in range(500)
+    ])
+    db.session.commit()
+    rates = rates_cache.get()
+    if materialized:
+        materialize_prices(rates)
+
+    summaries = CategorySummaries()
+    summaries.materialized = materialized
+    rows = summaries.summarize(db.session.execute(summaries.statement(rates)).all())
+    for category, summary in zip(categories, rows):
+        prices = [calculate_price(p.weight, rates.gold_22k, p.making_charge, rates.gst)
+                  for p in Product.query.filter_by(category_id=category.id)]
+        assert summary['product_count'] == len(prices)
+        assert summary['min_price'] == (min(prices) if prices else None)
+        assert summary['max_price'] == (max(prices) if prices else None)
+
+
+def test_unbackfilled_materialized_prices_fall_back_to_the_expression(app):
+    category = Category.query.order_by(Category.id).first()
+    db.session.add(Product(name='P', name_bn='P', category_id=category.id, purity='22K',
+                           weight=2.3, making_charge=450.0))
+    db.session.commit()
+    assert Product.query.one().current_price is None
+
+    rates = rates_cache.get()
+    summaries = CategorySummaries()
+    summaries.materialized = True
+    summary = summaries.summarize(db.session.execute(summaries.statement(rates)).all())[0]
+    price = calculate_price(2.3, rates.gold_22k, 450.0, rates.gst)
+    assert summary['min_price'] == summary['max_price'] == price
+
+
+def test_homepage_shows_categories_without_a_price_range(app):
+    summary = dict(Category.query.first().to_dict(), product_count=3, min_price=None, max_price=None)
+    with app.test_request_context('/'):
+        html = render_template('index.html', shop_name='', shop_area='', shop_phone='', shop_whatsapp='',
+                               gold_rate=rates_cache.get(), categories=[summary])
+    assert '3টি গহনা' in html
@@ -0,0 +1,31 @@
+import os
+
+from PIL import Image
+
+from image_jobs import make_variants, variant_path, variant_sources
+
+SIZES = {'thumb': 200, 'card': 400, 'detail': 800, 'zoom': 1600}
+
+
+def test_variants_skip_upscaling_and_report_real_widths(tmp_path):
+    image_path = str(tmp_path / 'uploads' / 'ring.jpg')
+    os.makedirs(os.path.dirname(image_path))
+    Image.new('RGB', (300, 600), 'gold').save(image_path)  # portrait: height limits the width
+
+    written = make_variants(image_path, SIZES, ['webp', 'jpg'])
+
+    assert written == {'card': 200, 'thumb': 100}
+    assert not os.path.exists(variant_path(image_path, 'detail', 'jpg'))
+    assert sorted(os.listdir(tmp_path / 'uploads')) == [
+        'ring.jpg', 'ring_card.jpg', 'ring_card.webp', 'ring_thumb.jpg', 'ring_thumb.webp']
+    assert variant_sources('uploads/ring.jpg', str(tmp_path), SIZES, ['webp', 'jpg']) == [
+        ('image/webp', [('uploads/ring_thumb.webp', 100), ('uploads/ring_card.webp', 200)]),
+        ('image/jpeg', [('uploads/ring_thumb.jpg', 100), ('uploads/ring_card.jpg', 200)]),
+    ]
+
+
+def test_small_images_get_no_variants(tmp_path):
+    image_path = str(tmp_path / 'chain.png')
+    Image.new('RGB', (150, 150), 'silver').save(image_path)
+    assert make_variants(image_path, SIZES, ['jpg']) == {}
+    assert variant_sources('chain.png', str(tmp_path), SIZES, ['jpg']) == []
@@ -0,0 +1,53 @@
+import random
+
+import commands
+from database import db, Category, Product
+from pricing import calculate_price, calculate_prices, materialize_prices
+from rates_cache import rates_cache
+
+
+def random_products(rng, count):
+    # Weights in milligram steps and making charges in paise, as the admin enters them
+    return [(round(rng.uniform(0.5, 80), 3), round(rng.uniform(100, 2500), 2)) for _ in range(count)]
+
+
+def test_calculate_prices_matches_calculate_price():
+    rng = random.Random(4)
+    products = random_products(rng, 20000)
+    for gold_rate, gst in ((6450.0, 3.0), (7123.45, 3.0), (5999.99, 5.5)):
+        prices = calculate_prices([w for w, _ in products], [m for _, m in products], gold_rate, gst)
+        assert prices == [calculate_price(w, gold_rate, m, gst) for w, m in products]
+
+
+def test_materialize_prices_matches_calculate_price(app):
+    rng = random.Random(5)
+    category = Category.query.first()
+    db.session.add_all([
+        Product(name=f'P{i}', name_bn=f'P{i}', category_id=category.id, purity='22K',
+                weight=weight, making_charge=making_charge)
+        for i, (weight, making_charge) in enumerate(random_products(rng, 2000))
+    ])
+    db.session.commit()
+
+    rates = rates_cache.get()
+    assert materialize_prices(rates, batch_size=300) == 2000
+    db.session.expire_all()
+    for product in Product.query.all():
+        assert product.current_price == calculate_price(product.weight, rates.gold_22k,
+                                                        product.making_charge, rates.gst)
+
+
+def test_init_db_backfills_prices_when_materialized_pricing_is_turned_on(app):
+    category = Category.query.first()
+    db.session.add(Product(name='P', name_bn='P', category_id=category.id, purity='22K',
+                           weight=2.3, making_charge=450.0))
+    db.session.commit()
+    assert Product.query.one().current_price is None
+
+    app.config['MATERIALIZED_PRICING'] = True
+    try:
+        commands.init_db()
+    finally:
+        app.config['MATERIALIZED_PRICING'] = False
+    rates = rates_cache.get()
+    assert Product.query.one().current_price == calculate_price(2.3, rates.gold_22k, 450.0, rates.gst)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from unittest import mock
+
+import api
+
+
+def history_etag(client, when, path='/api/rates/history'):
+    with mock.patch.object(api, 'datetime', wraps=datetime) as clock:
+        clock.utcnow.return_value = when
+        response = client.get(path)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def test_default_window_etag_changes_with_the_day(app):
+    client = app.test_client()
+    morning = history_etag(client, datetime(2026, 3, 1, 9))
+    assert history_etag(client, datetime(2026, 3, 1, 18)) == morning
+    assert history_etag(client, datetime(2026, 3, 2, 9)) != morning
+
+
+def test_explicit_window_etag_ignores_the_day(app):
+    client = app.test_client()
+    path = '/api/rates/history?from=2026-01-01&to=2026-02-01'
+    assert history_etag(client, datetime(2026, 3, 1), path) == history_etag(client, datetime(2026, 3, 2), path)
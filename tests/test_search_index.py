@@ -0,0 +1,32 @@
+import time
+
+from database import db, Category, Product
+from search_index import search_index
+
+
+def wait_for_rebuild():
+    deadline = time.monotonic() + 5
+    while search_index._rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_invalidations_are_rebuilt_once_on_the_next_search(app, monkeypatch):
+    category = Category.query.first()
+    search_index.rebuild()
+    rebuilds = []
+    rebuild = search_index.rebuild
+    monkeypatch.setattr(search_index, 'rebuild', lambda: rebuilds.append(1) or rebuild())
+
+    db.session.add(Product(name='Ruby necklace', name_bn='রুবি নেকলেস', category_id=category.id,
+                           purity='22K', weight=12.0, making_charge=500.0))
+    db.session.commit()
+    for _ in range(3):
+        search_index.invalidate()
+    assert rebuilds == []
+
+    search_index.search('ruby')  # served from the old index while it rebuilds
+    wait_for_rebuild()
+    assert rebuilds == [1]
+    total, results = search_index.search('ruby')
+    assert total == 1 and results[0][0]['name'] == 'Ruby necklace'
+    assert rebuilds == [1]
@@ -0,0 +1,55 @@
+import os
+import threading
+import time
+
+
+class VersionFile:
+    """A version token shared by every worker process on the host.
+
+    bump() writes a new token; readers compare tokens to learn that their
+    in-process data went stale. Reading costs one small file read, far
+    cheaper than a database round trip. A missing path disables sharing
+    and read() always returns None.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def read(self):
+        if not self.path:
+            return None
+        try:
+            with open(self.path) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def ensure(self):
+        """Create the file if no worker has written it yet"""
+        if self.path and not os.path.exists(self.path):
+            self.bump()
+
+    def bump(self):
+        """Write a new token and return it"""
+        if not self.path:
+            return None
+        token = f"{time.time_ns()}-{os.getpid()}"
+        # Per thread, so concurrent bumps in one worker never share a temp file
+        tmp_path = f"{self.path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(token)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Version file error ({self.path}): {e}")
+            return None
+        return token
+
+    def age(self):
+        """Seconds since the last bump, or None if there is no shared file"""
+        if not self.path:
+            return None
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return None